@@ -1,28 +1,58 @@
-from typing import List, Any
+from typing import List, Any, Tuple, Dict, MutableSequence
 
 import random
 
 import string
 
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from numpy import ndarray
+
 from algorithm.common.structure import TreeNode
 
 DEFAULT_LETTER = string.ascii_letters + string.digits
 
 
-def swap(array: List[Any], i: int, j: int) -> None:
+def swap(array: MutableSequence[Any], i: int, j: int) -> None:
     """
-    使用位运算加速交换数组
+    交换数组中的两个元素，适用于任意类型的元素和支持下标赋值的序列
     :param array: 数组
     :param i: 索引1
     :param j: 索引2
     :return: None
     """
-    if i == j:
-        return
+    array[i], array[j] = array[j], array[i]
 
-    array[i] = array[i] ^ array[j]
-    array[j] = array[i] ^ array[j]
-    array[i] = array[i] ^ array[j]
+
+def create_shared_array(shape: Tuple[int, ...], dtype, source: ndarray = None) -> Tuple[SharedMemory, ndarray, Dict]:
+    """
+    在共享内存中创建numpy数组，子进程可以通过描述信息零拷贝地访问
+    :param shape: 数组形状
+    :param dtype: 数据类型
+    :param source: 初始数据，为None时不初始化
+    :return: 共享内存对象（使用完毕后由创建者close并unlink），数组，描述信息
+    """
+    dtype = np.dtype(dtype)
+    # 共享内存大小不能为0
+    size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+    shm = SharedMemory(create=True, size=size)
+    array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    if source is not None:
+        array[...] = source
+
+    return shm, array, {"name": shm.name, "shape": tuple(shape), "dtype": dtype.str}
+
+
+def attach_shared_array(meta: Dict) -> Tuple[SharedMemory, ndarray]:
+    """
+    根据描述信息连接create_shared_array创建的共享数组
+    :param meta: 描述信息
+    :return: 共享内存对象（需要保持引用直到不再使用数组），数组
+    """
+    shm = SharedMemory(name=meta["name"])
+    return shm, np.ndarray(meta["shape"], dtype=np.dtype(meta["dtype"]), buffer=shm.buf)
 
 
 def get_random_string(length: int, base: str = DEFAULT_LETTER) -> str:
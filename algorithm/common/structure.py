@@ -1,6 +1,334 @@
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from numpy import ndarray
+
 from binarytree import Node
 
 
 class TreeNode(Node):
     def __init__(self, value):
         super(TreeNode, self).__init__(value)
+
+
+class CSRGraph:
+    """
+    压缩稀疏行（CSR）格式的图，只占用O(V+E)内存
+    第i个节点的出边终点为indices[indptr[i]:indptr[i + 1]]，对应权重为weights中的同一段
+    """
+
+    def __init__(self,
+                 indptr: ndarray,
+                 indices: ndarray,
+                 weights: ndarray,
+                 node_list: Optional[List[Hashable]] = None,
+                 is_directed: bool = True):
+        """
+        :param indptr: 行偏移数组，长度为节点数量+1
+        :param indices: 边终点索引数组，长度为边数量
+        :param weights: 边权重数组，长度为边数量
+        :param node_list: 索引-节点ID列表，为None时节点ID即为索引
+        :param is_directed: 是否有向图
+        """
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.node_list = list(range(len(indptr) - 1)) if node_list is None else list(node_list)
+        self.node_index = {node: i for i, node in enumerate(self.node_list)}
+        self.is_directed = is_directed
+
+    @classmethod
+    def from_edges(cls,
+                   node_num: int,
+                   sources: ndarray,
+                   targets: ndarray,
+                   weights: Optional[ndarray] = None,
+                   node_list: Optional[List[Hashable]] = None,
+                   is_directed: bool = True) -> "CSRGraph":
+        """
+        从边数组构建CSRGraph，无向图的每条边会同时写入两个方向
+        :param node_num: 节点数量
+        :param sources: 边起点索引数组
+        :param targets: 边终点索引数组
+        :param weights: 边权重数组，为None时权重均为1
+        :param node_list: 索引-节点ID列表
+        :param is_directed: 是否有向图
+        :return: CSRGraph对象
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.ones(len(sources)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+        if not is_directed:
+            # 自环只保留一个方向
+            not_loop = sources != targets
+            sources, targets = (np.concatenate((sources, targets[not_loop])),
+                                np.concatenate((targets, sources[not_loop])))
+            weights = np.concatenate((weights, weights[not_loop]))
+
+        # 按(起点, 终点)排序，保证每一行的邻居按索引升序排列
+        order = np.lexsort((targets, sources))
+        indices = targets[order]
+        weights = weights[order]
+        indptr = np.zeros(node_num + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=node_num), out=indptr[1:])
+
+        return cls(indptr, indices, weights, node_list, is_directed)
+
+    @classmethod
+    def from_graph(cls, graph, weight: str = "weight") -> "CSRGraph":
+        """
+        从networkx的Graph/DiGraph对象构建CSRGraph
+        :param graph: Graph对象
+        :param weight: 权重属性名称，缺省权重为1
+        :return: CSRGraph对象
+        """
+        node_list = list(graph.nodes)
+        node_index = {node: i for i, node in enumerate(node_list)}
+        edge_num = graph.number_of_edges()
+
+        sources = np.fromiter((node_index[u] for u, _ in graph.edges()), dtype=np.int64, count=edge_num)
+        targets = np.fromiter((node_index[v] for _, v in graph.edges()), dtype=np.int64, count=edge_num)
+        weights = np.fromiter((w for _, _, w in graph.edges(data=weight, default=1)),
+                              dtype=np.float64, count=edge_num)
+
+        return cls.from_edges(len(node_list), sources, targets, weights, node_list, graph.is_directed())
+
+    def number_of_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    def number_of_edges(self) -> int:
+        """
+        边数量，无向图的每条边只计算一次
+        """
+        edge_num = len(self.indices)
+        if self.is_directed:
+            return edge_num
+
+        loop_num = int(np.count_nonzero(self.indices == np.repeat(np.arange(self.number_of_nodes()),
+                                                                   np.diff(self.indptr))))
+        return (edge_num + loop_num) // 2
+
+    def neighbors(self, index: int) -> Tuple[ndarray, ndarray]:
+        """
+        获取节点的邻居
+        :param index: 节点索引
+        :return: 邻居索引数组，边权重数组
+        """
+        start, end = self.indptr[index], self.indptr[index + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def transpose(self) -> "CSRGraph":
+        """
+        获取所有边反向后的图，无向图直接返回自身
+        :return: CSRGraph对象
+        """
+        if not self.is_directed:
+            return self
+
+        sources = np.repeat(np.arange(self.number_of_nodes()), np.diff(self.indptr))
+        return CSRGraph.from_edges(self.number_of_nodes(), self.indices, sources, self.weights, self.node_list)
+
+    def get_node_dict(self) -> Dict[int, Any]:
+        """
+        :return: 索引-节点ID字典
+        """
+        return dict(enumerate(self.node_list))
+
+
+class IndexedMinHeap:
+    """
+    支持decrease-key的索引二叉最小堆，元素为0~capacity-1的整数，键相同时索引小的优先
+    """
+
+    def __init__(self, capacity: int):
+        """
+        :param capacity: 元素索引上限
+        """
+        self._heap: List[int] = []
+        self._keys: List[float] = [0.0] * capacity
+        self._positions: List[int] = [-1] * capacity
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, item: int) -> bool:
+        return self._positions[item] != -1
+
+    def push(self, item: int, key: float) -> None:
+        """
+        插入元素
+        :param item: 元素索引
+        :param key: 键
+        :return: None
+        """
+        self._keys[item] = key
+        self._positions[item] = len(self._heap)
+        self._heap.append(item)
+        self._sift_up(len(self._heap) - 1)
+
+    def decrease_key(self, item: int, key: float) -> None:
+        """
+        减小堆中元素的键
+        :param item: 元素索引
+        :param key: 新的键，必须不大于原来的键
+        :return: None
+        """
+        self._keys[item] = key
+        self._sift_up(self._positions[item])
+
+    def pop(self) -> Tuple[int, float]:
+        """
+        弹出键最小的元素
+        :return: 元素索引，键
+        """
+        heap = self._heap
+        item = heap[0]
+        last = heap.pop()
+        self._positions[item] = -1
+        if heap:
+            heap[0] = last
+            self._positions[last] = 0
+            self._sift_down(0)
+
+        return item, self._keys[item]
+
+    def _less(self, a: int, b: int) -> bool:
+        key_a, key_b = self._keys[a], self._keys[b]
+        return key_a < key_b or (key_a == key_b and a < b)
+
+    def _sift_up(self, index: int) -> None:
+        heap, positions = self._heap, self._positions
+        item = heap[index]
+        while index > 0:
+            parent_index = (index - 1) >> 1
+            parent = heap[parent_index]
+            if not self._less(item, parent):
+                break
+            heap[index] = parent
+            positions[parent] = index
+            index = parent_index
+        heap[index] = item
+        positions[item] = index
+
+    def _sift_down(self, index: int) -> None:
+        heap, positions = self._heap, self._positions
+        size = len(heap)
+        item = heap[index]
+        child_index = 2 * index + 1
+        while child_index < size:
+            if child_index + 1 < size and self._less(heap[child_index + 1], heap[child_index]):
+                child_index += 1
+            child = heap[child_index]
+            if not self._less(child, item):
+                break
+            heap[index] = child
+            positions[child] = index
+            index = child_index
+            child_index = 2 * index + 1
+        heap[index] = item
+        positions[item] = index
+
+
+class DisjointSet:
+    """
+    并查集，使用numpy整型数组保存父节点和集合大小，迭代式路径减半+按大小合并
+    """
+
+    def __init__(self, size: int):
+        """
+        :param size: 元素数量，元素为0~size-1的整数
+        """
+        self.parent = np.arange(size, dtype=np.int64)
+        self.size = np.ones(size, dtype=np.int64)
+        # 单个元素的读写通过memoryview进行，取值得到python整数，没有numpy标量的开销
+        self._parent_view = memoryview(self.parent)
+        self._size_view = memoryview(self.size)
+
+    def find(self, item: int) -> int:
+        """
+        查找元素所在集合的根节点
+        :param item: 元素
+        :return: 根节点
+        """
+        parent = self._parent_view
+        while parent[item] != item:
+            # 路径减半：让当前节点直接指向祖父节点
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+
+        return int(item)
+
+    def union(self, item1: int, item2: int) -> bool:
+        """
+        合并两个元素所在的集合
+        :param item1: 元素1
+        :param item2: 元素2
+        :return: 是否发生了合并，两个元素已在同一集合时返回False
+        """
+        root1, root2 = self.find(item1), self.find(item2)
+        if root1 == root2:
+            return False
+
+        # 将较小的集合挂到较大的集合上
+        size = self._size_view
+        if size[root1] < size[root2]:
+            root1, root2 = root2, root1
+        self._parent_view[root2] = root1
+        size[root1] += size[root2]
+
+        return True
+
+    def union_many(self, items1: Sequence[int], items2: Sequence[int], max_union: Optional[int] = None) -> List[int]:
+        """
+        批量合并元素对，在python列表上执行路径减半和按大小合并，结束后一次性写回数组
+        :param items1: 元素1序列
+        :param items2: 元素2序列，与items1一一对应
+        :param max_union: 最多发生的合并次数，达到后停止，为None时不限制
+        :return: 发生了合并的元素对的序号列表
+        """
+        items1 = items1.tolist() if isinstance(items1, ndarray) else items1
+        items2 = items2.tolist() if isinstance(items2, ndarray) else items2
+        parent, size = self.parent.tolist(), self.size.tolist()
+        merged = []
+
+        for k, (root1, root2) in enumerate(zip(items1, items2)):
+            while parent[root1] != root1:
+                parent[root1] = parent[parent[root1]]
+                root1 = parent[root1]
+            while parent[root2] != root2:
+                parent[root2] = parent[parent[root2]]
+                root2 = parent[root2]
+            if root1 == root2:
+                continue
+
+            if size[root1] < size[root2]:
+                root1, root2 = root2, root1
+            parent[root2] = root1
+            size[root1] += size[root2]
+            merged.append(k)
+            if len(merged) == max_union:
+                break
+
+        self.parent[:] = parent
+        self.size[:] = size
+        return merged
+
+    def connected(self, item1: int, item2: int) -> bool:
+        """
+        :return: 两个元素是否在同一集合中
+        """
+        return self.find(item1) == self.find(item2)
+
+    def get_roots(self) -> ndarray:
+        """
+        批量获取所有元素的根节点，使用向量化的指针跳跃并压缩路径
+        :return: 根节点数组
+        """
+        parent = self.parent
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                return parent.copy()
+            parent[:] = grandparent
@@ -1,18 +1,28 @@
-from typing import Dict, Union, Any, Tuple, Set
+from typing import Dict, Union, Any, Tuple, Set, List, Optional, Generator, Iterator, Callable, Hashable, Iterable
 
-from collections import deque
+from collections import deque, OrderedDict
+
+from weakref import WeakKeyDictionary
+
+import heapq
+
+import os
+
+import json
+
+import time
+
+from concurrent.futures import ProcessPoolExecutor
 
 import sys
 
 import math
 
-import random
-
 from numpy import ndarray
 
 import networkx as nx
 
-from networkx.exception import NetworkXNoPath
+from networkx.exception import NodeNotFound
 
 from networkx.classes.graph import Graph
 
@@ -20,64 +30,184 @@ from networkx.classes.digraph import DiGraph
 
 import matplotlib.pyplot as plt
 
-__all__ = ["get_random_graph", "show_graph", "get_all_path", "get_shortest_path",
-           "get_graph_from_matrix", "get_matrix_from_graph", "dfs", "bfs", "prim",
-           "floyd", "get_dict_from_graph", "get_graph_from_dict", "kruskal", "GRAPH_MAX_VALUE"]
+from matplotlib.figure import Figure
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from matplotlib.collections import LineCollection
+
+import numpy as np
+
+from scipy.sparse import csr_array, issparse, spmatrix, sparray
+
+from algorithm.common.structure import CSRGraph, DisjointSet, IndexedMinHeap
+
+from algorithm.common.common_util import create_shared_array, attach_shared_array
+
+from fileutil.file_util import PropertyFileUtil
+
+__all__ = ["get_random_graph", "get_random_csr", "get_random_edges", "get_csr_from_graph", "show_graph", "get_layout",
+           "render_graph", "get_all_path", "iter_all_path", "get_shortest_path", "get_all_pairs_shortest_length",
+           "get_shortest_path_bidirectional", "get_shortest_path_astar", "get_euclidean_heuristic", "ShortestPathCache",
+           "DynamicGraph", "get_graph_from_matrix", "get_matrix_from_graph", "dfs", "bfs", "iter_dfs", "iter_bfs",
+           "bfs_levels", "prim", "floyd", "reconstruct_path", "get_strongly_connected_components",
+           "get_connected_components", "get_spanning_forests", "get_dict_from_graph", "get_graph_from_dict",
+           "save_graph", "load_graph", "load_csr_from_csv", "kruskal", "GRAPH_MAX_VALUE"]
 
 plt.rcParams["font.sans-serif"] = ["SimHei"]  # 设置字体
 plt.rcParams["axes.unicode_minus"] = False  # 该语句解决图像中的“-”负号的乱码问题
 
 GRAPH_MAX_VALUE = sys.maxsize
 
+# 布局缓存：Graph对象 -> {布局函数: ((节点数量, 边数量), 布局)}，图对象被回收后自动删除
+_LAYOUT_CACHE = WeakKeyDictionary()
+
+# save_graph保存的CSR数组
+_GRAPH_ARRAY_NAMES = ("indptr", "indices", "weights")
+
+# 全源最短路径子进程中连接的共享数组
+_APSP_WORKER_STATE = {}
+
 
 def get_random_graph(node_num: int,
                      edge_num: int,
-                     is_directed: bool = True) -> Union[Graph, DiGraph]:
-    assert edge_num < math.factorial(node_num - 1), "边的数量不能大于节点数量的笛卡尔积"
+                     is_directed: bool = True,
+                     model: str = "er",
+                     seed: Optional[int] = None) -> Union[Graph, DiGraph]:
+    """
+    生成随机带权图，所有边一次性批量加入
+    :param node_num: 节点数量
+    :param edge_num: 边数量，模型的含义见get_random_edges
+    :param is_directed: 是否有向图
+    :param model: 随机图模型，er、ba或grid
+    :param seed: 随机种子
+    :return: Graph或DiGraph对象，grid模型的节点带有pos坐标属性
+    """
+    sources, targets, weights = get_random_edges(node_num, edge_num, is_directed, model, seed)
+
+    res_graph = nx.DiGraph() if is_directed else nx.Graph()
+    res_graph.add_nodes_from(range(node_num))
+    res_graph.add_weighted_edges_from(zip(sources.tolist(), targets.tolist(), weights.tolist()))
+    if model == "grid":
+        side = math.ceil(math.sqrt(node_num))
+        nx.set_node_attributes(res_graph, {i: divmod(i, side) for i in range(node_num)}, "pos")
+
+    return res_graph
+
+
+def get_random_csr(node_num: int,
+                   edge_num: int,
+                   is_directed: bool = True,
+                   model: str = "er",
+                   seed: Optional[int] = None) -> CSRGraph:
+    """
+    生成随机带权图的CSR结构，不创建networkx对象
+    :param node_num: 节点数量
+    :param edge_num: 边数量，模型的含义见get_random_edges
+    :param is_directed: 是否有向图
+    :param model: 随机图模型，er、ba或grid
+    :param seed: 随机种子
+    :return: CSRGraph对象
+    """
+    sources, targets, weights = get_random_edges(node_num, edge_num, is_directed, model, seed)
+
+    return CSRGraph.from_edges(node_num, sources, targets, weights, is_directed=is_directed)
+
+
+def get_random_edges(node_num: int,
+                     edge_num: int,
+                     is_directed: bool = True,
+                     model: str = "er",
+                     seed: Optional[int] = None,
+                     weight_range: Tuple[int, int] = (1, 20)) -> Tuple[ndarray, ndarray, ndarray]:
+    """
+    批量生成随机边，不含自环和重复边
+    er：Erdős–Rényi G(n, m)模型，恰好edge_num条边，一次性无放回抽取边编号
+    ba：Barabási–Albert优先连接模型，每个新节点连接edge_num // node_num（至少为1）个已有节点
+    grid：类似路网的网格模型，节点按行排列在边长为ceil(sqrt(node_num))的网格上，随机保留edge_num条相邻边
+    :param node_num: 节点数量
+    :param edge_num: 边数量
+    :param is_directed: 是否有向图
+    :param model: 随机图模型
+    :param seed: 随机种子
+    :param weight_range: 整数权重范围[low, high]
+    :return: 起点数组，终点数组，权重数组
+    """
     assert node_num > 0, "节点数量不能够小于0"
     assert edge_num > 0, "边的数量不能够小于0"
+    rng = np.random.default_rng(seed)
+
+    if model == "er":
+        sources, targets = _get_er_edges(node_num, edge_num, is_directed, rng)
+    elif model == "ba":
+        sources, targets = _get_ba_edges(node_num, max(1, edge_num // node_num), rng)
+    elif model == "grid":
+        sources, targets = _get_grid_edges(node_num, edge_num, rng)
+    else:
+        raise ValueError(f"不支持的随机图模型{model}")
 
-    res_graph = _get_empty_graph(node_num, is_directed)
-    created_edges = set()
-    weighted_edges = [_get_random_weight_edge(res_graph, node_num, created_edges) for _ in range(edge_num)]
-    res_graph.add_weighted_edges_from(weighted_edges)
+    weights = rng.integers(weight_range[0], weight_range[1] + 1, size=len(sources))
 
-    return res_graph
+    return sources, targets, weights
 
 
-def get_matrix_from_graph(graph: Graph) -> Tuple[ndarray, dict]:
+def get_matrix_from_graph(graph: Union[Graph, CSRGraph],
+                          sparse: bool = False) -> Tuple[Union[ndarray, csr_array], dict]:
     """
-    从Graph对象得到邻接矩阵
+    从Graph对象得到邻接矩阵，没有边的位置为0
+    :param graph: Graph对象或CSRGraph对象
+    :param sparse: 是否返回scipy的csr_array稀疏矩阵，大图应使用稀疏矩阵避免V×V的内存占用
+    :return: ndarray对象或csr_array对象，索引-节点ID字典
+    """
+    csr = _get_csr(graph)
+    node_num = csr.number_of_nodes()
+
+    if sparse:
+        matrix = csr_array((csr.weights, csr.indices, csr.indptr), shape=(node_num, node_num))
+    else:
+        matrix = np.zeros((node_num, node_num))
+        matrix[np.repeat(np.arange(node_num), np.diff(csr.indptr)), csr.indices] = csr.weights
+
+    return matrix, csr.get_node_dict()
+
+
+def get_csr_from_graph(graph: Graph, weight: str = "weight") -> CSRGraph:
+    """
+    从Graph对象得到CSR稀疏邻接结构，只占用O(V+E)内存，可以构建一次后重复传给bfs、dfs、prim、kruskal
     :param graph: Graph对象
-    :return: ndarray对象，索引-节点ID字典
+    :param weight: 权重属性名称
+    :return: CSRGraph对象
     """
-    nodes = graph.nodes
-    node_dic = {}
-    for i, v in enumerate(nodes):
-        node_dic[i] = v
-    return nx.adjacency_matrix(graph).todense(), node_dic
+    return CSRGraph.from_graph(graph, weight)
 
 
-def get_graph_from_matrix(matrix: ndarray,
+def get_graph_from_matrix(matrix: Union[ndarray, spmatrix, sparray],
                           node_dict: Dict[int, str]) -> DiGraph:
     """
-    从邻接矩阵中获取DiGraph对象
-    :param matrix: 邻接矩阵
+    从邻接矩阵中获取DiGraph对象，GRAPH_MAX_VALUE、inf、0和对角线元素不视为边，所有边一次性批量加入
+    :param matrix: 邻接矩阵，可以是ndarray或scipy稀疏矩阵
     :param node_dict: 索引-节点名称字典
     :return: DiGraph对象
     """
     graph = DiGraph()
 
-    row_num, col_num = matrix.shape
-    for row in range(row_num):
-        start_node_name = node_dict[row]
-        for col in range(col_num):
-            if matrix[row][col] == GRAPH_MAX_VALUE or row == col or matrix[row][col] == 0:
-                continue
+    if issparse(matrix):
+        coo = matrix.tocoo()
+        rows, cols, weights = coo.row, coo.col, coo.data
+    else:
+        matrix = np.asarray(matrix)
+        rows, cols = np.nonzero(matrix)
+        weights = matrix[rows, cols]
 
-            weight = matrix[row][col]
-            end_node_name = node_dict[col]
-            graph.add_edge(start_node_name, end_node_name, weight=weight)
+    mask = (rows != cols) & (weights != GRAPH_MAX_VALUE) & (weights != 0)
+    if np.issubdtype(weights.dtype, np.floating):
+        mask &= np.isfinite(weights)
+
+    node_names = np.empty(max(node_dict) + 1 if node_dict else 0, dtype=object)
+    node_names[list(node_dict.keys())] = list(node_dict.values())
+    graph.add_weighted_edges_from(zip(node_names[rows[mask]].tolist(),
+                                      node_names[cols[mask]].tolist(),
+                                      weights[mask].tolist()))
 
     return graph
 
@@ -113,233 +243,1035 @@ def get_graph_from_dict(node_dict: Dict) -> Graph:
     return graph
 
 
-def bfs(graph: Graph, start_node) -> str:
+def save_graph(graph: Union[Graph, CSRGraph, Dict], dir_path: str) -> None:
     """
-    bfs
-    :param graph: Graph对象
-    :param start_node: 起始节点ID
-    :return: bfs路径
+    将图以二进制文件保存到文件夹中：CSR的三个数组、节点ID和元信息，可以用load_graph内存映射加载
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :param dir_path: 文件夹路径，不存在时自动创建
+    :return: None
     """
-    adj_matrix, node_dict = get_matrix_from_graph(graph)
-    start_index = node_dict[start_node]
-    # 初始化队列和访问状态
-    queue = deque([start_index])
-    visited = {start_index}
-    res = []
+    csr = _get_csr(graph)
+    os.makedirs(dir_path, exist_ok=True)
+
+    for name in _GRAPH_ARRAY_NAMES:
+        np.save(os.path.join(dir_path, f"{name}.npy"), getattr(csr, name))
+
+    # numpy标量转换为对应的python类型
+    node_list = [node.item() if isinstance(node, np.generic) else node for node in csr.node_list]
+    node_types = {type(node) for node in node_list}
+    node_array = np.array(node_list) if len(node_types) == 1 and node_types <= {int, float, str} else None
+    if node_types <= {int} and node_list == list(range(len(node_list))):
+        # 节点ID即为索引时不需要保存节点
+        node_format = "range"
+    elif node_array is not None and node_array.dtype.kind in "iufU":
+        # 超过64位的整数会得到object数组，无法在不使用pickle的情况下加载，改用json保存
+        node_format = "npy"
+        np.save(os.path.join(dir_path, "nodes.npy"), node_array)
+    else:
+        node_format = "json"
+        with open(os.path.join(dir_path, "nodes.json"), "w", encoding="utf-8") as f:
+            json.dump(node_list, f, ensure_ascii=False, default=_get_json_value)
 
-    # 遍历队列中的节点
-    while queue:
-        node = queue.popleft()
-        res.append(node)
+    # 删除之前保存的其他格式的节点文件
+    for node_format_name, file_name in (("npy", "nodes.npy"), ("json", "nodes.json")):
+        file_path = os.path.join(dir_path, file_name)
+        if node_format != node_format_name and os.path.exists(file_path):
+            os.remove(file_path)
 
-        # 遍历所有邻居节点
-        neighbors = [i for i, x in enumerate(adj_matrix[node]) if x != GRAPH_MAX_VALUE and x != 0]
-        for neighbor in neighbors:
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append(neighbor)
+    with open(os.path.join(dir_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"is_directed": csr.is_directed, "node_format": node_format}, f)
+
+
+def load_graph(dir_path: str, mmap: bool = True) -> CSRGraph:
+    """
+    加载save_graph保存的图
+    :param dir_path: 文件夹路径
+    :param mmap: 是否以只读内存映射方式加载数组，多个进程加载同一个图时共享同一份物理内存页
+    :return: CSRGraph对象
+    """
+    with open(os.path.join(dir_path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
 
+    mmap_mode = "r" if mmap else None
+    arrays = [np.load(os.path.join(dir_path, f"{name}.npy"), mmap_mode=mmap_mode) for name in _GRAPH_ARRAY_NAMES]
+
+    if meta["node_format"] == "range":
+        node_list = None
+    elif meta["node_format"] == "npy":
+        node_list = np.load(os.path.join(dir_path, "nodes.npy")).tolist()
+    else:
+        with open(os.path.join(dir_path, "nodes.json"), encoding="utf-8") as f:
+            # json中的元组会被保存为列表，还原为可哈希的元组
+            node_list = [tuple(node) if isinstance(node, list) else node for node in json.load(f)]
+
+    return CSRGraph(*arrays, node_list=node_list, is_directed=meta["is_directed"])
+
+
+def _get_json_value(value: Any) -> Any:
+    """
+    json无法直接序列化的值，目前只处理元组等嵌套结构中的numpy标量
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"节点ID中的{type(value).__name__}类型无法保存为json")
+
+
+def load_csr_from_csv(file_path: str,
+                      source_column: Union[int, str] = 0,
+                      target_column: Union[int, str] = 1,
+                      weight_column: Union[int, str, None] = 2,
+                      is_directed: bool = True,
+                      has_header: bool = False,
+                      chunk_size: int = 100000,
+                      node_type: Optional[Callable[[str], Any]] = None,
+                      show_progress: bool = False) -> CSRGraph:
+    """
+    流式读取边列表csv文件构建CSRGraph，按块读取，节点名称映射为整数索引，每块只保留紧凑的numpy数组
+    :param file_path: csv文件路径
+    :param source_column: 起点所在列，可以是列序号或表头中的列名
+    :param target_column: 终点所在列
+    :param weight_column: 权重所在列，为None时权重均为1
+    :param is_directed: 是否有向图
+    :param has_header: 第一行是否为表头，使用列名时必须为True
+    :param chunk_size: 每块的行数
+    :param node_type: 节点名称的转换函数，例如int，为None时保留字符串
+    :param show_progress: 是否在每块读取完成后打印已读取行数和速度
+    :return: CSRGraph对象
+    """
+    columns = [source_column, target_column, weight_column]
+    if any(isinstance(column, str) for column in columns):
+        assert has_header, "使用列名时csv文件必须包含表头"
+        header = next(PropertyFileUtil.iter_csv_data(file_path, chunk_size=1))[0]
+        columns = [header.index(column) if isinstance(column, str) else column for column in columns]
+    source_column, target_column, weight_column = columns
+
+    node_index = {}
+    node_list = []
+    sources, targets, weights = [], [], []
+    row_num = 0
+    start_time = time.perf_counter()
+
+    def intern(name: str) -> int:
+        # 先转换节点名称再分配索引，"1"和"01"转换为int后是同一个节点
+        node = name if node_type is None else node_type(name)
+        index = node_index.get(node)
+        if index is None:
+            index = node_index[node] = len(node_list)
+            node_list.append(node)
+        return index
+
+    for chunk in PropertyFileUtil.iter_csv_data(file_path, chunk_size, skip_header=has_header):
+        sources.append(np.fromiter((intern(row[source_column]) for row in chunk), dtype=np.int64, count=len(chunk)))
+        targets.append(np.fromiter((intern(row[target_column]) for row in chunk), dtype=np.int64, count=len(chunk)))
+        if weight_column is not None:
+            weights.append(np.fromiter((float(row[weight_column]) for row in chunk), dtype=np.float64,
+                                       count=len(chunk)))
+
+        row_num += len(chunk)
+        if show_progress:
+            elapsed = time.perf_counter() - start_time
+            print(f"已读取{row_num}行，{row_num / max(elapsed, 1e-9):.0f}行/秒")
+
+    def concat(arrays: List[ndarray], dtype) -> ndarray:
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+    return CSRGraph.from_edges(len(node_list), concat(sources, np.int64), concat(targets, np.int64),
+                               concat(weights, np.float64) if weight_column is not None else None,
+                               node_list, is_directed)
+
+
+def bfs(graph: Union[Graph, CSRGraph, Dict], start_node) -> str:
+    """
+    bfs
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :param start_node: 起始节点ID
+    :return: bfs路径
+    """
+    csr = _get_csr(graph)
+    res = [index for index, _, _ in _iter_bfs(csr, _get_node_index(csr, start_node))]
     path = "-->".join([f"{i}" for i in res])
 
     return path
 
 
-def dfs(graph: Graph, start_node: int) -> str:
+def dfs(graph: Union[Graph, CSRGraph, Dict], start_node) -> str:
     """
     dfs
-    :param graph: Graph对象
+    :param graph: Graph对象、CSRGraph对象或邻接字典
     :param start_node: 开始节点
     :return: DFS路径
     """
-    adj_matrix, node_dict = get_matrix_from_graph(graph)
-    start_index = node_dict[start_node]
-    visited = []
-    _dfs(adj_matrix, start_index, visited)
-    path = [f"{i}" for i in list(visited)]
-    path = "-->".join(path)
+    csr = _get_csr(graph)
+    res = [index for index, _, _ in _iter_dfs(csr, _get_node_index(csr, start_node))]
+    path = "-->".join([f"{i}" for i in res])
 
     return path
 
 
-def prim(graph: Graph, show: bool = False) -> tuple[list[tuple[None, int, Any]], Union[int, Any]]:
+def bfs_levels(graph: Union[Graph, CSRGraph, Dict], start_nodes) -> Tuple[ndarray, ndarray]:
     """
-    prim算法
-    :param graph: Graph对象
+    按层同步的向量化bfs，每一层用numpy批量展开整个前沿，适合无权可达性和跳数查询
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :param start_nodes: 起始节点ID或起始节点ID列表，多个起点时距离为到最近起点的跳数
+    :return: 跳数数组，父节点索引数组，按CSRGraph.node_list的索引排列，不可达的跳数和父节点以及起点的父节点为-1
+    """
+    csr = _get_csr(graph)
+    node_num = csr.number_of_nodes()
+    # 节点ID本身可能是元组等可迭代对象，先按单个节点查找；只有非字符串的可迭代对象才视为起点列表
+    is_node = isinstance(start_nodes, Hashable) and start_nodes in csr.node_index
+    if is_node or not isinstance(start_nodes, Iterable) or isinstance(start_nodes, (str, bytes)):
+        start_nodes = [start_nodes]
+    frontier = np.unique(np.array([_get_node_index(csr, node) for node in start_nodes], dtype=np.int64))
+
+    dist = np.full(node_num, -1, dtype=np.int64)
+    parents = np.full(node_num, -1, dtype=np.int64)
+    dist[frontier] = 0
+    level = 0
+
+    while len(frontier):
+        # 收集前沿所有节点的出边：第i个前沿节点的边位于indptr[i]开始的连续counts[i]个位置
+        starts = csr.indptr[frontier]
+        counts = csr.indptr[frontier + 1] - starts
+        offsets = np.cumsum(counts) - counts
+        edge_positions = np.arange(counts.sum()) + np.repeat(starts - offsets, counts)
+        neighbors = csr.indices[edge_positions]
+        neighbor_parents = np.repeat(frontier, counts)
+
+        # 去掉已访问的节点，同一节点被多个前沿节点发现时取第一个作为父节点
+        unvisited = dist[neighbors] == -1
+        frontier, first = np.unique(neighbors[unvisited], return_index=True)
+        level += 1
+        dist[frontier] = level
+        parents[frontier] = neighbor_parents[unvisited][first]
+
+    return dist, parents
+
+
+def iter_bfs(graph: Union[Graph, CSRGraph, Dict],
+             start_node,
+             with_detail: bool = False) -> Generator[Any, None, None]:
+    """
+    惰性bfs遍历，可以随时停止迭代
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :param start_node: 起始节点ID
+    :param with_detail: 是否同时返回深度和父节点
+    :return: 节点ID生成器，with_detail为True时生成(节点ID, 深度, 父节点ID)，起始节点的父节点为None
+    """
+    csr = _get_csr(graph)
+    yield from _map_traversal(csr, _iter_bfs(csr, _get_node_index(csr, start_node)), with_detail)
+
+
+def iter_dfs(graph: Union[Graph, CSRGraph, Dict],
+             start_node,
+             with_detail: bool = False) -> Generator[Any, None, None]:
+    """
+    惰性dfs遍历（先序），使用显式栈，不受递归深度限制
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :param start_node: 起始节点ID
+    :param with_detail: 是否同时返回深度和父节点
+    :return: 节点ID生成器，with_detail为True时生成(节点ID, 深度, 父节点ID)，起始节点的父节点为None
+    """
+    csr = _get_csr(graph)
+    yield from _map_traversal(csr, _iter_dfs(csr, _get_node_index(csr, start_node)), with_detail)
+
+
+def prim(graph: Union[Graph, CSRGraph, Dict],
+         show: bool = False) -> tuple[list[tuple[int, int, Any]], Union[int, Any]]:
+    """
+    prim算法，使用支持decrease-key的二叉堆，时间复杂度O(E log V)
+    图不连通时从每个未访问的节点重新开始，返回最小生成森林
+    :param graph: Graph对象、CSRGraph对象或邻接字典
     :param show: 是否可视化
     :return: 连接的边，总权重
     """
-    adj_matrix, noded_dict = get_matrix_from_graph(graph)
+    csr = _get_csr(graph)
+    node_num = csr.number_of_nodes()
+    indptr, indices, weights = csr.indptr.tolist(), csr.indices.tolist(), csr.weights.tolist()
     # 初始化父节点、权重和访问状态数组
-    parent = [None] * len(adj_matrix)
-    weight = [float('inf')] * len(adj_matrix)
-    visited = [False] * len(adj_matrix)
-
-    # 初始节点选择为0
-    weight[0] = 0
-    parent[0] = -1
-
-    # 遍历所有节点
-    for _ in range(len(adj_matrix)):
-        # 找到当前未访问的距离最小的节点
-        min_weight, u = float('inf'), None
-        for i in range(len(adj_matrix)):
-            if not visited[i] and weight[i] < min_weight:
-                min_weight = weight[i]
-                u = i
-
-        # 将节点标记为已访问
-        if u is not None:
+    parent = [-1] * node_num
+    weight = [float('inf')] * node_num
+    visited = [False] * node_num
+    heap = IndexedMinHeap(node_num)
+
+    for root in range(node_num):
+        if visited[root]:
+            continue
+
+        # 每棵树的根节点权重为0
+        weight[root] = 0
+        heap.push(root, 0)
+        while heap:
+            # 取出当前未访问的距离最小的节点并标记为已访问
+            u, _ = heap.pop()
             visited[u] = True
 
-        # 更新与该节点相邻的节点的权重和父节点
-        for v in range(len(adj_matrix)):
-            if adj_matrix[u][v] and not visited[v] and adj_matrix[u][v] < weight[v]:
-                weight[v] = adj_matrix[u][v]
+            # 更新与该节点相邻的节点的权重和父节点
+            for i in range(indptr[u], indptr[u + 1]):
+                v, w = indices[i], weights[i]
+                if visited[v] or w >= weight[v]:
+                    continue
+                weight[v] = w
                 parent[v] = u
+                if v in heap:
+                    heap.decrease_key(v, w)
+                else:
+                    heap.push(v, w)
 
     # 构建结果数组
-    result = []
-    for i in range(1, len(parent)):
-        result.append((parent[i], i, adj_matrix[i][parent[i]]))
+    result = [(parent[i], i, weight[i]) for i in range(node_num) if parent[i] != -1]
 
     edges = [(edge[0], edge[1]) for edge in result]
     weight_sum = sum([edge[2] for edge in result])
 
-    _draw_nodes_and_edges(graph, None, edges) if show else None
+    _draw_nodes_and_edges(graph, None, edges) if show and isinstance(graph, Graph) else None
     # 返回结果数组
     return result, weight_sum
 
 
-def kruskal(graph: Graph, show: bool = False) -> tuple[list[tuple[int, int, Any]], Union[int, Any]]:
+def kruskal(graph: Union[Graph, CSRGraph, Dict],
+            show: bool = False) -> tuple[list[tuple[int, int, Any]], Union[int, Any]]:
     """
-    kruskal算法
-    :param graph: Graph对象
+    kruskal算法，边的提取和排序都在numpy中完成，图不连通时返回最小生成森林
+    :param graph: Graph对象、CSRGraph对象或邻接字典
     :param show: 是否可视化
     :return: 连接的边，总权重
     """
-    adj_matrix, node_dict = get_matrix_from_graph(graph)
-    # 定义结果数组
-    result = []
-    # 定义父节点和秩的字典
-    parent = {}
-    rank = {}
-
-    # 查找节点的根节点
-    def find(node):
-        if parent[node] != node:
-            parent[node] = find(parent[node])
-        return parent[node]
-
-    # 将两个节点合并为一个集合
-    def union(node1, node2):
-        # 找到两个节点的根节点
-        root1, root2 = find(node1), find(node2)
-        # 如果两个节点已经在同一个集合中，则返回False
-        if root1 == root2:
-            return False
-        # 否则，将秩较小的根节点连接到秩较大的根节点上
-        if rank[root1] < rank[root2]:
-            root1, root2 = root2, root1
-        parent[root2] = root1
-        # 更新秩
-        rank[root1] += rank[root2]
-        # 返回True表示节点已经合并
-        return True
-
-    # 获取所有边并按权重排序
-    edges = []
-    for i in range(len(adj_matrix)):
-        for j in range(i, len(adj_matrix)):
-            if adj_matrix[i][j] != 0:
-                edges.append((adj_matrix[i][j], i, j))
-    edges.sort()
-
-    # 初始化父节点和秩的字典
-    for i in range(len(adj_matrix)):
-        parent[i] = i
-        rank[i] = 1
-
-    # 遍历排序后的边
-    for weight, u, v in edges:
-        # 如果可以将两个节点合并为一个集合，则将它们加入结果数组中
-        if union(u, v):
-            result.append((u, v, weight))
+    csr = _get_csr(graph)
+    node_num = csr.number_of_nodes()
+    sources, targets, weights = _get_sorted_edges(csr)
+    sources, targets, weights = sources.tolist(), targets.tolist(), weights.tolist()
+    # 按权重顺序批量合并边的两个端点，能合并的边即为生成树的边，合并node_num - 1次后停止
+    merged = DisjointSet(node_num).union_many(sources, targets, max(node_num - 1, 0))
+    result = [(sources[k], targets[k], weights[k]) for k in merged]
 
     edges = [(edge[0], edge[1]) for edge in result]
     weight_sum = sum([edge[2] for edge in result])
 
-    _draw_nodes_and_edges(graph, None, special_edges=edges) if show else None
+    _draw_nodes_and_edges(graph, None, special_edges=edges) if show and isinstance(graph, Graph) else None
 
     # 返回结果数组
     return result, weight_sum
 
 
-def floyd(graph: Graph) -> tuple[ndarray, Dict]:
+def get_strongly_connected_components(graph: Union[Graph, CSRGraph, Dict]) -> ndarray:
     """
-    floyd
-    :param graph: Graph对象
-    :return: 最短距离邻接矩阵，索引-节点ID字典
+    迭代式Tarjan算法求强连通分量，使用显式调用栈，不受递归深度限制
+    :param graph: Graph对象、CSRGraph对象或邻接字典，无向图的结果与连通分量相同
+    :return: 分量编号数组，按CSRGraph.node_list的索引排列，编号从0开始连续，按分量完成的顺序（逆拓扑序）编号
+    """
+    csr = _get_csr(graph)
+    node_num = csr.number_of_nodes()
+    indptr, indices = memoryview(np.ascontiguousarray(csr.indptr)), memoryview(np.ascontiguousarray(csr.indices))
+    # 访问序号、能回溯到的最小访问序号
+    order = [-1] * node_num
+    low = [0] * node_num
+    on_stack = bytearray(node_num)
+    stack = []
+    labels = np.full(node_num, -1, dtype=np.int64)
+    counter = component = 0
+
+    for root in range(node_num):
+        if order[root] != -1:
+            continue
+
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        # 调用栈中保存(节点, 下一条待检查的边)
+        calls = [(root, indptr[root])]
+
+        while calls:
+            node, edge = calls[-1]
+            if edge < indptr[node + 1]:
+                calls[-1] = (node, edge + 1)
+                neighbor = indices[edge]
+                if order[neighbor] == -1:
+                    order[neighbor] = low[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack[neighbor] = 1
+                    calls.append((neighbor, indptr[neighbor]))
+                elif on_stack[neighbor] and order[neighbor] < low[node]:
+                    low[node] = order[neighbor]
+                continue
+
+            # 节点的所有边都已检查，相当于递归返回
+            calls.pop()
+            if calls and low[node] < low[calls[-1][0]]:
+                low[calls[-1][0]] = low[node]
+            if low[node] == order[node]:
+                # node是分量的根，弹出整个分量
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    labels[member] = component
+                    if member == node:
+                        break
+                component += 1
+
+    return labels
+
+
+def get_connected_components(graph: Union[Graph, CSRGraph, Dict]) -> ndarray:
+    """
+    求连通分量（有向图为弱连通分量），在所有边上用numpy批量做标签挂接和指针跳跃，直到每条边两端标签相同
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :return: 分量编号数组，按CSRGraph.node_list的索引排列，编号从0开始，按分量中最小的节点索引排序
+    """
+    csr = _get_csr(graph)
+    sources = np.repeat(np.arange(csr.number_of_nodes()), np.diff(csr.indptr))
+    targets = csr.indices
+    # 每个节点的标签始终不大于自身索引，所有节点最终指向分量中最小的索引
+    labels = np.arange(csr.number_of_nodes())
+
+    while True:
+        source_labels, target_labels = labels[sources], labels[targets]
+        different = source_labels != target_labels
+        if not different.any():
+            break
+
+        # 挂接：标签较大的根指向相邻的较小标签
+        np.minimum.at(labels, np.maximum(source_labels, target_labels)[different],
+                      np.minimum(source_labels, target_labels)[different])
+        # 指针跳跃：让每个节点直接指向根
+        while True:
+            root_labels = labels[labels]
+            if np.array_equal(root_labels, labels):
+                break
+            labels = root_labels
+
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def get_spanning_forests(graph: Union[Graph, CSRGraph, Dict],
+                         labels: Optional[ndarray] = None,
+                         method: str = "kruskal") -> Dict[int, tuple[list[tuple[int, int, Any]], Union[int, Any]]]:
     """
-    matrix, node_dict = get_matrix_from_graph(graph)
-    m = matrix.shape[0]
-    parents = [[i] * m for i in range(m)]
+    按分量分别求最小生成树，只使用两端在同一分量内的边
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :param labels: 分量编号数组，例如get_connected_components或get_strongly_connected_components的结果，
+                   为None时使用get_connected_components
+    :param method: kruskal或prim
+    :return: 分量编号 -> (连接的边，总权重)，单节点分量的边为空列表
+    """
+    assert method in ("kruskal", "prim"), f"不支持的最小生成树算法{method}"
+    csr = _get_csr(graph)
+    labels = get_connected_components(csr) if labels is None else np.asarray(labels)
+
+    sources = np.repeat(np.arange(csr.number_of_nodes()), np.diff(csr.indptr))
+    inner = labels[sources] == labels[csr.indices]
+    # 去掉跨分量的边后，整体的最小生成森林就是每个分量各自的最小生成树
+    sub_csr = CSRGraph(*_get_sub_csr_arrays(csr.number_of_nodes(), sources[inner], csr.indices[inner],
+                                            csr.weights[inner]), node_list=csr.node_list, is_directed=csr.is_directed)
+    edges, _ = kruskal(sub_csr) if method == "kruskal" else prim(sub_csr)
+
+    forests = {int(label): ([], 0) for label in np.unique(labels)}
+    for edge in edges:
+        component_edges, weight_sum = forests[int(labels[edge[0]])]
+        component_edges.append(edge)
+        forests[int(labels[edge[0]])] = component_edges, weight_sum + edge[2]
+
+    return forests
+
 
-    for k in range(m):
-        for i in range(m):
-            for j in range(m):
-                if matrix[i][k] + matrix[k][j] < matrix[i][j]:
-                    matrix[i][j] = matrix[i][k] + matrix[k][j]
-                    parents[i][j] = parents[k][j]  # 更新父结点
+def floyd(graph: Union[Graph, CSRGraph],
+          block_size: Optional[int] = None,
+          return_parents: bool = False) -> Union[tuple[ndarray, Dict], tuple[ndarray, Dict, ndarray]]:
+    """
+    floyd，每个中转节点k用numpy广播一次性松弛整个矩阵
+    :param graph: Graph对象或CSRGraph对象
+    :param block_size: 分块大小，不为None时使用分块（tiled）版本，适合放不进缓存的大矩阵
+    :param return_parents: 是否同时返回前驱矩阵，可配合reconstruct_path还原路径
+    :return: 最短距离邻接矩阵（不可达为inf），索引-节点ID字典，[前驱矩阵]
+    """
+    csr = _get_csr(graph)
+    node_num = csr.number_of_nodes()
+    rows = np.repeat(np.arange(node_num), np.diff(csr.indptr))
+
+    # 初始化距离矩阵和前驱矩阵，parents[i][j]为i到j最短路径上j的前一个节点，-1表示不可达
+    matrix = np.full((node_num, node_num), np.inf)
+    matrix[rows, csr.indices] = csr.weights
+    np.fill_diagonal(matrix, 0)
+    parents = None
+    if return_parents:
+        parents = np.full((node_num, node_num), -1, dtype=np.int64)
+        parents[rows, csr.indices] = rows
+        np.fill_diagonal(parents, np.arange(node_num))
+
+    if block_size is None:
+        _floyd_relax(matrix, parents, slice(0, node_num), slice(0, node_num), 0, node_num)
+    else:
+        assert block_size > 0, "分块大小必须大于0"
+        _floyd_blocked(matrix, parents, block_size)
 
-    return matrix, node_dict
+    node_dict = csr.get_node_dict()
+    return (matrix, node_dict, parents) if return_parents else (matrix, node_dict)
 
 
-def get_shortest_path(graph: Graph,
+def reconstruct_path(parents: ndarray, start: int, end: int) -> List[int]:
+    """
+    根据floyd返回的前驱矩阵还原最短路径
+    :param parents: 前驱矩阵
+    :param start: 开始节点索引
+    :param end: 结束节点索引
+    :return: 最短路径经过的节点索引，不可达时为空列表
+    """
+    if parents[start, end] == -1:
+        return []
+
+    path = [end]
+    while end != start:
+        end = int(parents[start, end])
+        path.append(end)
+
+    return path[::-1]
+
+
+def get_all_pairs_shortest_length(graph: Union[Graph, CSRGraph, Dict],
+                                  workers: Optional[int] = None,
+                                  chunk_size: int = 64,
+                                  out_path: Optional[str] = None) -> tuple[ndarray, Dict]:
+    """
+    多进程全源最短路径：CSR数组放入共享内存，每个进程对一批起点运行单源迪杰斯特拉
+    指定out_path时子进程把结果直接写入内存映射文件，否则子进程返回每批起点的结果，由主进程写入结果矩阵，
+    任何时候只有一份完整的V×V矩阵
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :param workers: 进程数量，为None时使用CPU核数，为1时在当前进程中计算
+    :param chunk_size: 每个任务包含的起点数量
+    :param out_path: 结果矩阵的内存映射文件路径，为None时结果为普通数组
+    :return: 最短距离矩阵（不可达为inf），索引-节点ID字典
+    """
+    assert chunk_size > 0, "每个任务的起点数量必须大于0"
+    csr = _get_csr(graph)
+    node_num = csr.number_of_nodes()
+    workers = workers if workers is not None else os.cpu_count() or 1
+    chunks = [(i, min(i + chunk_size, node_num)) for i in range(0, node_num, chunk_size)]
+
+    if out_path is not None:
+        result = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float64, shape=(node_num, node_num))
+    else:
+        result = np.empty((node_num, node_num), dtype=np.float64)
+
+    shms = []
+    try:
+        if workers == 1:
+            for start, end in chunks:
+                for source in range(start, end):
+                    result[source] = _dijkstra(csr, source)[0]
+        else:
+            arrays_meta = []
+            for array in (csr.indptr, csr.indices, csr.weights):
+                shm, _, meta = create_shared_array(array.shape, array.dtype, array)
+                shms.append(shm)
+                arrays_meta.append(meta)
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_apsp_worker,
+                                     initargs=(arrays_meta, out_path, csr.is_directed)) as executor:
+                # 依次消费结果，同时抛出子进程中的异常；写入内存映射文件时子进程返回None
+                for (start, end), rows in zip(chunks, executor.map(_apsp_worker, chunks)):
+                    if rows is not None:
+                        result[start:end] = rows
+
+        if out_path is not None:
+            result.flush()
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+    return result, csr.get_node_dict()
+
+
+def get_shortest_path(graph: Union[Graph, CSRGraph, Dict],
                       start: int,
                       end: int,
-                      show: bool = False) -> tuple[Union[list, dict, list[Any]], str, Union[int, Any]]:
+                      show: bool = False,
+                      cache: Optional["ShortestPathCache"] = None,
+                      stats: Optional[Dict[str, int]] = None) -> tuple[list[Any], str, Union[int, Any]]:
     """
-    使用迪杰斯特拉算法找寻最短路径
-    :param graph: Graph对象
+    使用迪杰斯特拉算法找寻带权最短路径，一次搜索同时得到路径和距离，到达终点后立即停止
+    :param graph: Graph对象、CSRGraph对象或邻接字典
     :param start: 开始节点
     :param end: 结束节点
     :param show: 是否可视化
+    :param cache: 最短路径树缓存，同一起点的重复查询直接从缓存中还原路径
+    :param stats: 统计字典，不为None时写入确定最短距离的节点数量settled，命中缓存时为0
     :return: 最短路径经过的节点，字符串表达，最短距离
     """
-    try:
-        shortest_path = nx.shortest_path(graph, start, end)
-        length = nx.shortest_path_length(graph, start, end)
-    except NetworkXNoPath:
-        shortest_path = []
-        length = GRAPH_MAX_VALUE
+    if cache is not None:
+        cache_stats = {}
+        shortest_path, length = cache.query(start, end, cache_stats)
+        settled_num = cache_stats["settled"]
+    else:
+        csr = _get_csr(graph)
+        start_index, end_index = _get_node_index(csr, start), _get_node_index(csr, end)
+        dist, parents, settled_num = _dijkstra(csr, start_index, end_index)
+        shortest_path, length = _get_path_from_tree(csr, dist, parents, end_index)
 
-    path = "->".join([f"{i}" for i in shortest_path])
-    edges = [(shortest_path[i], shortest_path[i + 1]) for i in range(0, len(shortest_path) - 1)]
+    if stats is not None:
+        stats["settled"] = settled_num
 
-    _draw_nodes_and_edges(graph, shortest_path, edges) if show else None
+    return _get_path_result(graph, shortest_path, length, show)
 
-    return shortest_path, path, length
 
+def get_shortest_path_bidirectional(graph: Union[Graph, CSRGraph, Dict],
+                                    start,
+                                    end,
+                                    show: bool = False,
+                                    stats: Optional[Dict[str, int]] = None) -> tuple[list[Any], str, Union[int, Any]]:
+    """
+    双向迪杰斯特拉算法，从起点和终点同时搜索，两侧堆顶距离之和不小于已知最短路径时停止
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :param start: 开始节点
+    :param end: 结束节点
+    :param show: 是否可视化
+    :param stats: 统计字典，不为None时写入settled、settled_forward、settled_backward
+    :return: 最短路径经过的节点，字符串表达，最短距离
+    """
+    csr = _get_csr(graph)
+    start_index, end_index = _get_node_index(csr, start), _get_node_index(csr, end)
+    # 正向在原图上搜索，反向在反向图上搜索
+    graphs = (csr, csr.transpose())
+    node_num = csr.number_of_nodes()
+    dists = ([math.inf] * node_num, [math.inf] * node_num)
+    parents = ([-1] * node_num, [-1] * node_num)
+    settled = (bytearray(node_num), bytearray(node_num))
+    settled_nums = [0, 0]
+    heaps = ([(0, start_index)], [(0, end_index)])
+    dists[0][start_index] = dists[1][end_index] = 0
+    best_length, meet_index = (0, start_index) if start_index == end_index else (math.inf, -1)
+
+    while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] < best_length:
+        # 每次扩展堆顶距离较小的一侧
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        d, u = heapq.heappop(heaps[side])
+        if settled[side][u]:
+            continue
+        settled[side][u] = 1
+        settled_nums[side] += 1
+
+        dist, other_dist, parent = dists[side], dists[1 - side], parents[side]
+        neighbors, weights = graphs[side].neighbors(u)
+        for v, w in zip(neighbors.tolist(), weights.tolist()):
+            new_dist = d + w
+            if new_dist < dist[v]:
+                dist[v] = new_dist
+                parent[v] = u
+                heapq.heappush(heaps[side], (new_dist, v))
+            # 两侧搜索相遇，更新已知最短路径
+            if dist[v] + other_dist[v] < best_length:
+                best_length, meet_index = dist[v] + other_dist[v], v
+
+    if stats is not None:
+        stats["settled_forward"], stats["settled_backward"] = settled_nums
+        stats["settled"] = sum(settled_nums)
+
+    if meet_index == -1:
+        return _get_path_result(graph, [], GRAPH_MAX_VALUE, show)
 
-def get_all_path(graph: Graph, start: str, end: str) -> list[str]:
+    forward_path, _ = _get_path_from_tree(csr, dists[0], parents[0], meet_index)
+    backward_path, _ = _get_path_from_tree(csr, dists[1], parents[1], meet_index)
+    shortest_path = forward_path + backward_path[-2::-1]
+
+    return _get_path_result(graph, shortest_path, float(best_length), show)
+
+
+def get_shortest_path_astar(graph: Union[Graph, CSRGraph, Dict],
+                            start,
+                            end,
+                            heuristic: Optional[Callable[[Any, Any], float]] = None,
+                            show: bool = False,
+                            stats: Optional[Dict[str, int]] = None) -> tuple[list[Any], str, Union[int, Any]]:
     """
-    找寻所有的路线
+    A*算法，按照已走距离加上启发函数估计的剩余距离扩展节点
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :param start: 开始节点
+    :param end: 结束节点
+    :param heuristic: 启发函数heuristic(节点ID, 终点ID)，必须不高估真实距离（可采纳且一致），为None时退化为迪杰斯特拉
+    :param show: 是否可视化
+    :param stats: 统计字典，不为None时写入确定最短距离的节点数量settled
+    :return: 最短路径经过的节点，字符串表达，最短距离
+    """
+    csr = _get_csr(graph)
+    start_index, end_index = _get_node_index(csr, start), _get_node_index(csr, end)
+    node_list = csr.node_list
+    node_num = csr.number_of_nodes()
+    dist = [math.inf] * node_num
+    parents = [-1] * node_num
+    settled = bytearray(node_num)
+    settled_num = 0
+    # 每个节点的启发值只计算一次
+    estimates = {}
+
+    def estimate(index: int) -> float:
+        if heuristic is None:
+            return 0
+        if index not in estimates:
+            estimates[index] = heuristic(node_list[index], end)
+        return estimates[index]
+
+    dist[start_index] = 0
+    heap = [(estimate(start_index), 0, start_index)]
+    while heap:
+        _, d, u = heapq.heappop(heap)
+        if settled[u]:
+            continue
+        settled[u] = 1
+        settled_num += 1
+        if u == end_index:
+            break
+
+        neighbors, weights = csr.neighbors(u)
+        for v, w in zip(neighbors.tolist(), weights.tolist()):
+            new_dist = d + w
+            if new_dist < dist[v]:
+                dist[v] = new_dist
+                parents[v] = u
+                heapq.heappush(heap, (new_dist + estimate(v), new_dist, v))
+
+    if stats is not None:
+        stats["settled"] = settled_num
+
+    shortest_path, length = _get_path_from_tree(csr, dist, parents, end_index)
+    return _get_path_result(graph, shortest_path, length, show)
+
+
+def get_euclidean_heuristic(graph: Graph, pos: str = "pos") -> Callable[[Any, Any], float]:
+    """
+    根据节点坐标属性生成A*使用的欧氏距离启发函数，边权重不小于坐标间的直线距离时才能保证结果最优
     :param graph: Graph对象
+    :param pos: 节点坐标属性名称
+    :return: 启发函数
+    """
+    positions = nx.get_node_attributes(graph, pos)
+
+    def heuristic(node, target) -> float:
+        return math.dist(positions[node], positions[target])
+
+    return heuristic
+
+
+class ShortestPathCache:
+    """
+    按起点缓存单源最短路径树，同一起点的重复查询只需O(路径长度)的时间
+    缓存基于创建时的图结构，图发生变化后需要调用clear或重新创建
+    """
+
+    def __init__(self, graph: Union[Graph, CSRGraph, Dict], max_size: Optional[int] = 128):
+        """
+        :param graph: Graph对象、CSRGraph对象或邻接字典
+        :param max_size: 最多缓存的起点数量，超出后淘汰最久未使用的起点，为None时不限制
+        """
+        self.csr = _get_csr(graph)
+        self.max_size = max_size
+        self._trees: OrderedDict[int, Tuple[ndarray, ndarray]] = OrderedDict()
+
+    def query(self, start, end, stats: Optional[Dict[str, int]] = None) -> Tuple[List[Any], Union[int, Any]]:
+        """
+        查询最短路径
+        :param start: 开始节点
+        :param end: 结束节点
+        :param stats: 统计字典，含义同get_tree
+        :return: 最短路径经过的节点，最短距离
+        """
+        dist, parents = self.get_tree(start, stats)
+        return _get_path_from_tree(self.csr, dist, parents, _get_node_index(self.csr, end))
+
+    def get_tree(self, start, stats: Optional[Dict[str, int]] = None) -> Tuple[ndarray, ndarray]:
+        """
+        获取起点的最短路径树，不在缓存中时运行一次完整的迪杰斯特拉算法
+        :param start: 开始节点
+        :param stats: 统计字典，不为None时写入确定最短距离的节点数量settled，命中缓存时为0
+        :return: 距离数组，父节点索引数组（-1表示起点或不可达）
+        """
+        start_index = _get_node_index(self.csr, start)
+        if start_index in self._trees:
+            self._trees.move_to_end(start_index)
+            if stats is not None:
+                stats["settled"] = 0
+            return self._trees[start_index]
+
+        dist, parents, settled_num = _dijkstra(self.csr, start_index)
+        if stats is not None:
+            stats["settled"] = settled_num
+        tree = np.array(dist), np.array(parents, dtype=np.int64)
+        self._trees[start_index] = tree
+        if self.max_size is not None and len(self._trees) > self.max_size:
+            self._trees.popitem(last=False)
+
+        return tree
+
+    def clear(self) -> None:
+        self._trees.clear()
+
+
+class DynamicGraph:
+    """
+    可变图包装：每次修改使版本号加一，算法结果按版本缓存
+    修改边权重或加边时尽量增量修复已有结果而不是重新计算：
+    floyd在权重减小时用经过该边的路径做一次O(V^2)的松弛；
+    无向图的prim/kruskal生成树在权重变化时做换边（删树边后找最小的跨割边，或加非树边后替换环上最大的边）；
+    其他情况（删边、加入新节点、权重增大时的floyd、最短路径树）在下次查询时重新计算
+    """
+
+    def __init__(self, graph: Graph):
+        """
+        :param graph: Graph对象，之后应通过DynamicGraph修改，直接修改会导致缓存失效不被察觉
+        """
+        self.graph = graph
+        self.version = 0
+        self._csr: Optional[CSRGraph] = None
+        # 结果缓存：名称 -> (版本号, 结果)
+        self._cache: Dict[str, Tuple[int, Any]] = {}
+
+    @property
+    def csr(self) -> CSRGraph:
+        """
+        当前版本的CSRGraph，图结构变化后惰性重建
+        """
+        if self._csr is None:
+            self._csr = CSRGraph.from_graph(self.graph)
+        return self._csr
+
+    def set_edge_weight(self, u, v, weight: float) -> None:
+        """
+        设置边权重，边不存在时加入新边
+        :param u: 起点
+        :param v: 终点
+        :param weight: 新权重
+        :return: None
+        """
+        has_edge = self.graph.has_edge(u, v)
+        has_nodes = u in self.graph and v in self.graph
+        old_weight = self.graph.edges[u, v].get("weight", 1) if has_edge else math.inf
+        self.graph.add_edge(u, v, weight=weight)
+
+        if not has_nodes:
+            # 加入了新节点，索引发生变化，所有结果都需要重新计算
+            self._csr = None
+            self._bump_version(set())
+            return
+
+        # 节点没有变化时索引不变，结构变化（加边）时CSR在需要时重建，只修改权重时原地更新
+        if has_edge and self._csr is not None:
+            self._set_csr_weight(self._csr.node_index[u], self._csr.node_index[v], weight)
+            if not self._csr.is_directed:
+                self._set_csr_weight(self._csr.node_index[v], self._csr.node_index[u], weight)
+        else:
+            self._csr = None
+
+        repaired = set()
+        names = [name for name in ("floyd", "prim", "kruskal") if self._is_current(name)]
+        if not names:
+            self._bump_version(repaired)
+            return
+
+        i, j = self.csr.node_index[u], self.csr.node_index[v]
+        if "floyd" in names and weight <= old_weight:
+            self._cache["floyd"] = self.version, self._repair_floyd(i, j, weight)
+            repaired.add("floyd")
+        if not self.graph.is_directed():
+            for name in ("prim", "kruskal"):
+                if name in names:
+                    self._cache[name] = self.version, self._repair_mst(self._cache[name][1], i, j, old_weight, weight)
+                    repaired.add(name)
+
+        self._bump_version(repaired)
+
+    def remove_edge(self, u, v) -> None:
+        """
+        删除边
+        :param u: 起点
+        :param v: 终点
+        :return: None
+        """
+        self.graph.remove_edge(u, v)
+        self._csr = None
+        self._bump_version(set())
+
+    def get_shortest_path(self, start, end) -> tuple[list[Any], str, Union[int, Any]]:
+        """
+        最短路径，同一版本内按起点缓存最短路径树
+        :return: 最短路径经过的节点，字符串表达，最短距离
+        """
+        cache = self._memoize("shortest_path", lambda: ShortestPathCache(self.csr, max_size=None))
+        return get_shortest_path(self.csr, start, end, cache=cache)
+
+    def prim(self) -> tuple[list[tuple[int, int, Any]], Union[int, Any]]:
+        """
+        :return: 连接的边，总权重
+        """
+        return self._memoize("prim", lambda: prim(self.csr))
+
+    def kruskal(self) -> tuple[list[tuple[int, int, Any]], Union[int, Any]]:
+        """
+        :return: 连接的边，总权重
+        """
+        return self._memoize("kruskal", lambda: kruskal(self.csr))
+
+    def floyd(self) -> tuple[ndarray, Dict]:
+        """
+        :return: 最短距离邻接矩阵，索引-节点ID字典
+        """
+        return self._memoize("floyd", lambda: floyd(self.csr))
+
+    def _memoize(self, name: str, compute: Callable[[], Any]) -> Any:
+        if not self._is_current(name):
+            self._cache[name] = self.version, compute()
+        return self._cache[name][1]
+
+    def _is_current(self, name: str) -> bool:
+        return name in self._cache and self._cache[name][0] == self.version
+
+    def _bump_version(self, repaired: Set[str]) -> None:
+        """
+        版本号加一，已经增量修复的结果同步到新版本
+        """
+        self.version += 1
+        for name in repaired:
+            self._cache[name] = self.version, self._cache[name][1]
+
+    def _set_csr_weight(self, i: int, j: int, weight: float) -> None:
+        """
+        原地修改CSR中已有边的权重，每行的邻居有序，二分查找边的位置
+        """
+        csr = self._csr
+        start, end = csr.indptr[i], csr.indptr[i + 1]
+        csr.weights[start + np.searchsorted(csr.indices[start:end], j)] = weight
+
+    def _repair_floyd(self, i: int, j: int, weight: float) -> tuple[ndarray, Dict]:
+        """
+        边(i, j)的权重减小为weight后，所有点对只可能因为经过该边而变短
+        """
+        matrix, node_dict = self._cache["floyd"][1]
+        matrix = np.minimum(matrix, np.add.outer(matrix[:, i], weight + matrix[j, :]))
+        if not self.graph.is_directed():
+            matrix = np.minimum(matrix, np.add.outer(matrix[:, j], weight + matrix[i, :]))
+
+        return matrix, node_dict
+
+    def _repair_mst(self, mst: tuple[list[tuple[int, int, Any]], Union[int, Any]], i: int, j: int,
+                    old_weight: float, weight: float) -> tuple[list[tuple[int, int, Any]], Union[int, Any]]:
+        """
+        边(i, j)的权重变化后通过换边修复最小生成森林
+        """
+        edges = list(mst[0])
+        position = next((k for k, (a, b, _) in enumerate(edges) if {a, b} == {i, j}), -1)
+
+        if i == j:
+            pass
+        elif position != -1:
+            edges[position] = (i, j, weight)
+            if weight > old_weight:
+                # 树边变大：删掉它，在两侧子树之间找权重最小的边重新连接
+                edges.pop(position)
+                side = np.zeros(self.csr.number_of_nodes(), dtype=np.int8)
+                side[_get_tree_component(edges, i, len(side))] = 1
+                side[_get_tree_component(edges, j, len(side))] = 2
+                # 在未排序的边数组上筛选跨割边并取权重最小的一条，O(E)；权重相同时取(起点, 终点)最小的边，与kruskal一致
+                csr = self.csr
+                sources = np.repeat(np.arange(csr.number_of_nodes()), np.diff(csr.indptr))
+                crossing_mask = side[sources] + side[csr.indices] == 3
+                if not csr.is_directed:
+                    crossing_mask &= sources <= csr.indices
+                crossing = np.nonzero(crossing_mask)[0]
+                best = crossing[np.argmin(csr.weights[crossing])]
+                edges.append((int(sources[best]), int(csr.indices[best]), csr.weights[best].item()))
+        elif weight < old_weight:
+            # 非树边变小：它与树上路径构成环，替换环上权重最大的边
+            path = _get_tree_path(edges, i, j, self.csr.number_of_nodes())
+            if path is None:
+                edges.append((i, j, weight))
+            else:
+                path_edges = {frozenset(edge) for edge in zip(path, path[1:])}
+                max_position = max((k for k, (a, b, _) in enumerate(edges) if frozenset((a, b)) in path_edges),
+                                   key=lambda k: edges[k][2])
+                if weight < edges[max_position][2]:
+                    edges[max_position] = (i, j, weight)
+
+        return edges, sum([edge[2] for edge in edges])
+
+
+def get_all_path(graph: Union[Graph, CSRGraph, Dict],
+                 start,
+                 end,
+                 cutoff: Optional[int] = None,
+                 limit: Optional[int] = None,
+                 max_weight: Optional[float] = None) -> list[str]:
+    """
+    找寻所有的路线
+    :param graph: Graph对象、CSRGraph对象或邻接字典
     :param start: 开始节点
     :param end: 结束节点
+    :param cutoff: 路径最多包含的边数，为None时不限制
+    :param limit: 最多返回的路径数量，为None时不限制
+    :param max_weight: 路径总权重上限，为None时不限制
     :return: 所有可能的路径
     """
-    paths_list = nx.all_simple_paths(graph, start, end)
-    res = []
+    return ["->".join(map(str, path)) for path in iter_all_path(graph, start, end, cutoff, limit, max_weight)]
 
-    if paths_list is None:
-        return res
-    else:
-        for path in paths_list:
-            path = map(str, path)
-            res.append("->".join(path))
 
-        return res
+def iter_all_path(graph: Union[Graph, CSRGraph, Dict],
+                  start,
+                  end,
+                  cutoff: Optional[int] = None,
+                  limit: Optional[int] = None,
+                  max_weight: Optional[float] = None) -> Generator[Tuple[Any, ...], None, None]:
+    """
+    惰性枚举所有简单路径，搜索过程中按边数和权重上限剪枝
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :param start: 开始节点
+    :param end: 结束节点
+    :param cutoff: 路径最多包含的边数，为None时不限制
+    :param limit: 最多生成的路径数量，为None时不限制
+    :param max_weight: 路径总权重上限，为None时不限制，剪枝要求边权重非负
+    :return: 节点ID元组生成器
+    """
+    csr = _get_csr(graph)
+    start_index, end_index = _get_node_index(csr, start), _get_node_index(csr, end)
+    if (limit is not None and limit <= 0) or (cutoff is not None and cutoff < 0):
+        return
+
+    node_list = csr.node_list
+    if start_index == end_index:
+        yield node_list[start_index],
+        return
+
+    indptr, indices = memoryview(np.ascontiguousarray(csr.indptr)), memoryview(np.ascontiguousarray(csr.indices))
+    weights = memoryview(np.ascontiguousarray(csr.weights, dtype=np.float64))
+    max_depth = cutoff if cutoff is not None else csr.number_of_nodes()
+    max_weight = max_weight if max_weight is not None else math.inf
+    on_path = bytearray(csr.number_of_nodes())
+    on_path[start_index] = 1
+    # 当前路径、路径上每个节点的累计权重、每个节点下一条待检查的边
+    path, path_weights, stack = [start_index], [0.0], [indptr[start_index]]
+    count = 0
+
+    while stack:
+        node, edge = path[-1], stack[-1]
+        # 当前路径已经达到最大边数时不再向下扩展
+        if edge == indptr[node + 1] or len(path) > max_depth:
+            stack.pop()
+            on_path[path.pop()] = 0
+            path_weights.pop()
+            continue
+
+        stack[-1] = edge + 1
+        neighbor, weight = indices[edge], path_weights[-1] + weights[edge]
+        if on_path[neighbor] or weight > max_weight:
+            continue
+
+        if neighbor == end_index:
+            yield tuple(node_list[i] for i in path) + (node_list[neighbor],)
+            count += 1
+            if limit is not None and count >= limit:
+                return
+        else:
+            path.append(neighbor)
+            path_weights.append(weight)
+            stack.append(indptr[neighbor])
+            on_path[neighbor] = 1
 
 
 def show_graph(graph: Graph,
@@ -348,13 +1280,94 @@ def show_graph(graph: Graph,
                edge_color: str = 'purple',
                edge_width: int = 3,
                show_label: bool = True) -> None:
-    layout = layout if layout is not None else nx.circular_layout(graph)
+    layout = layout if layout is not None else get_layout(graph)
 
     _draw_nodes(graph, layout, node_color, font_size=13, font_family="sans-serif")
     _draw_edges(graph, layout, edge_color, edge_width, show_label)
     _set_mpl()
 
 
+def get_layout(graph: Graph, layout_function: Callable = nx.circular_layout) -> Dict[Any, ndarray]:
+    """
+    获取图的布局，按图对象和布局函数缓存，节点集合（含顺序）或边的数量变化后重新计算
+    :param graph: Graph对象
+    :param layout_function: networkx布局函数
+    :return: 节点ID-坐标字典
+    """
+    # 节点数量不变时节点集合也可能变化，例如删掉一个节点再加入另一个，所以签名中包含全部节点
+    signature = (tuple(graph.nodes), graph.number_of_edges())
+    layouts = _LAYOUT_CACHE.setdefault(graph, {})
+    cached = layouts.get(layout_function)
+    if cached is None or cached[0] != signature:
+        cached = layouts[layout_function] = signature, layout_function(graph)
+
+    return cached[1]
+
+
+def render_graph(graph: Graph,
+                 file_path: str,
+                 special_nodes: Optional[Iterable] = None,
+                 special_edges: Optional[Iterable[Tuple[Any, Any]]] = None,
+                 layout: Optional[Dict[Any, ndarray]] = None,
+                 node_color: str = 'purple',
+                 edge_color: str = 'g',
+                 special_color: str = 'r',
+                 node_size: float = 20,
+                 edge_width: float = 1,
+                 show_label: bool = False,
+                 figsize: Tuple[float, float] = (8, 8),
+                 dpi: int = 100) -> str:
+    """
+    无界面地把图渲染到文件，使用Agg画布而不是pyplot，不会阻塞也不需要显示器
+    所有边作为一个LineCollection一次性绘制，特殊节点和特殊边用集合判断
+    :param graph: Graph对象
+    :param file_path: 输出文件路径，格式由扩展名决定，例如png、svg
+    :param special_nodes: 需要高亮的节点ID
+    :param special_edges: 需要高亮的边，无向图不区分方向
+    :param layout: 节点ID-坐标字典，为None时使用get_layout缓存的圆形布局
+    :param node_color: 节点颜色
+    :param edge_color: 边颜色
+    :param special_color: 高亮颜色
+    :param node_size: 节点大小
+    :param edge_width: 边宽度
+    :param show_label: 是否显示节点ID
+    :param figsize: 图片尺寸（英寸）
+    :param dpi: 分辨率
+    :return: 输出文件路径
+    """
+    layout = layout if layout is not None else get_layout(graph)
+    nodes = list(graph.nodes)
+    node_index = {node: i for i, node in enumerate(nodes)}
+    positions = np.array([layout[node] for node in nodes], dtype=np.float64).reshape(-1, 2)
+
+    special_nodes = set(special_nodes) if special_nodes is not None else set()
+    special_edges = set(special_edges) if special_edges is not None else set()
+    if not graph.is_directed():
+        special_edges |= {(v, u) for u, v in special_edges}
+
+    edges = list(graph.edges())
+    edge_indices = np.array([(node_index[u], node_index[v]) for u, v in edges], dtype=np.int64).reshape(-1, 2)
+    edge_colors = [special_color if edge in special_edges else edge_color for edge in edges]
+    node_colors = [special_color if node in special_nodes else node_color for node in nodes]
+
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    # 边的线段数组形状为(边数, 2, 2)
+    ax.add_collection(LineCollection(positions[edge_indices], colors=edge_colors, linewidths=edge_width, zorder=1))
+    ax.scatter(positions[:, 0], positions[:, 1], s=node_size, c=node_colors, zorder=2)
+    if show_label:
+        for node, (x, y) in zip(nodes, positions):
+            ax.text(x, y, str(node), fontsize=8, ha='center', va='center')
+
+    ax.autoscale()
+    ax.margins(0.05)
+    ax.set_axis_off()
+    figure.savefig(file_path)
+
+    return file_path
+
+
 def _draw_nodes_and_edges(graph: Graph, special_nodes, special_edges) -> None:
     """
     画所有的边和节点
@@ -363,47 +1376,415 @@ def _draw_nodes_and_edges(graph: Graph, special_nodes, special_edges) -> None:
     :param special_edges:
     :return:
     """
-    layout = nx.circular_layout(graph)
+    layout = get_layout(graph)
     _draw_nodes(graph, layout, 'purple', special_nodes=special_nodes)
     _draw_edges(graph, layout, 'g', 3, special_edges=special_edges)
     _set_mpl()
 
 
-def _dfs(graph, start, visited=None) -> None:
-    if visited is None:
-        visited = []
-    visited.append(start)
-    for next in range(len(graph[start])):
-        if graph[start][next] and next not in visited:
-            _dfs(graph, next, visited)
+def _iter_bfs(csr: CSRGraph, start: int) -> Generator[Tuple[int, int, int], None, None]:
+    """
+    bfs遍历节点索引
+    :param csr: CSRGraph对象
+    :param start: 起始节点索引
+    :return: (节点索引, 深度, 父节点索引)生成器，起始节点的父节点为-1
+    """
+    # memoryview按元素取值得到的是python整数，既不拷贝数组也没有numpy标量的开销
+    indptr, indices = memoryview(np.ascontiguousarray(csr.indptr)), memoryview(np.ascontiguousarray(csr.indices))
+    # 初始化队列和访问状态
+    visited = bytearray(csr.number_of_nodes())
+    visited[start] = 1
+    queue = deque([(start, 0, -1)])
 
+    # 遍历队列中的节点
+    while queue:
+        node, depth, parent = queue.popleft()
+        yield node, depth, parent
 
-def _get_empty_graph(node_num: int, is_directed: bool) -> Union[Graph, DiGraph]:
-    graph = nx.DiGraph() if is_directed else nx.Graph()
-    for i in range(node_num):
-        graph.add_node(i)
+        # 遍历所有邻居节点
+        for i in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[i]
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                queue.append((neighbor, depth + 1, node))
 
-    return graph
 
+def _iter_dfs(csr: CSRGraph, start: int) -> Generator[Tuple[int, int, int], None, None]:
+    """
+    dfs遍历节点索引，栈中保存(节点索引, 下一条待检查的边)，访问顺序与递归实现一致
+    :param csr: CSRGraph对象
+    :param start: 起始节点索引
+    :return: (节点索引, 深度, 父节点索引)生成器，起始节点的父节点为-1
+    """
+    indptr, indices = memoryview(np.ascontiguousarray(csr.indptr)), memoryview(np.ascontiguousarray(csr.indices))
+    visited = bytearray(csr.number_of_nodes())
+    visited[start] = 1
+    stack = [(start, indptr[start])]
+    yield start, 0, -1
+
+    while stack:
+        node, edge = stack[-1]
+        end = indptr[node + 1]
+        while edge < end and visited[indices[edge]]:
+            edge += 1
+
+        if edge == end:
+            stack.pop()
+            continue
+
+        neighbor = indices[edge]
+        stack[-1] = (node, edge + 1)
+        visited[neighbor] = 1
+        yield neighbor, len(stack), node
+        stack.append((neighbor, indptr[neighbor]))
+
+
+def _map_traversal(csr: CSRGraph,
+                   traversal: Iterator[Tuple[int, int, int]],
+                   with_detail: bool) -> Generator[Any, None, None]:
+    """
+    将遍历得到的节点索引转换为节点ID
+    """
+    node_list = csr.node_list
+    for index, depth, parent in traversal:
+        if with_detail:
+            yield node_list[index], depth, node_list[parent] if parent != -1 else None
+        else:
+            yield node_list[index]
+
+
+def _get_tree_adjacency(edges: List[tuple[int, int, Any]], node_num: int) -> List[List[int]]:
+    adjacency = [[] for _ in range(node_num)]
+    for a, b, _ in edges:
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+
+    return adjacency
 
-def _get_random_weight_edge(graph: Graph, node_num: int, created_edges: Set[Tuple[int, int]]) -> Tuple[Any, Any, float]:
+
+def _get_tree_component(edges: List[tuple[int, int, Any]], root: int, node_num: int) -> List[int]:
     """
-    获取带权重边
-    :param graph: Graph对象
-    :param node_num: 节点数量
-    :param created_edges: 已经创建的边
-    :return: 节点1，节点2，权重
+    获取森林中root所在的树的所有节点
     """
-    weight = random.randint(1, 20)
-    while True:
-        node1, node2 = random.sample(range(node_num), 2)
-        if (node1, node2) not in created_edges:
+    adjacency = _get_tree_adjacency(edges, node_num)
+    visited = {root}
+    stack = [root]
+    while stack:
+        for neighbor in adjacency[stack.pop()]:
+            if neighbor not in visited:
+                visited.add(neighbor)
+                stack.append(neighbor)
+
+    return list(visited)
+
+
+def _get_tree_path(edges: List[tuple[int, int, Any]], start: int, end: int, node_num: int) -> Optional[List[int]]:
+    """
+    获取森林中两个节点之间的路径，不在同一棵树中时返回None
+    """
+    adjacency = _get_tree_adjacency(edges, node_num)
+    parents = {start: -1}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        if node == end:
+            path = []
+            while node != -1:
+                path.append(node)
+                node = parents[node]
+            return path[::-1]
+        for neighbor in adjacency[node]:
+            if neighbor not in parents:
+                parents[neighbor] = node
+                queue.append(neighbor)
+
+    return None
+
+
+def _dijkstra(csr: CSRGraph, start: int, end: int = -1) -> Tuple[List[float], List[int], int]:
+    """
+    迪杰斯特拉算法，使用惰性删除的二叉堆
+    :param csr: CSRGraph对象
+    :param start: 开始节点索引
+    :param end: 结束节点索引，到达后提前停止，为-1时计算完整的最短路径树
+    :return: 距离列表，父节点索引列表，确定最短距离的节点数量
+    """
+    indptr, indices = memoryview(np.ascontiguousarray(csr.indptr)), memoryview(np.ascontiguousarray(csr.indices))
+    weights = memoryview(np.ascontiguousarray(csr.weights, dtype=np.float64))
+    node_num = csr.number_of_nodes()
+    dist = [math.inf] * node_num
+    parents = [-1] * node_num
+    settled = bytearray(node_num)
+    settled_num = 0
+
+    dist[start] = 0
+    heap = [(0, start)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if settled[u]:
+            continue
+        settled[u] = 1
+        settled_num += 1
+        if u == end:
             break
-    if not isinstance(graph, DiGraph):
-        created_edges.add((node2, node1))
-    created_edges.add((node1, node2))
 
-    return node1, node2, weight
+        for i in range(indptr[u], indptr[u + 1]):
+            v = indices[i]
+            new_dist = d + weights[i]
+            if new_dist < dist[v]:
+                dist[v] = new_dist
+                parents[v] = u
+                heapq.heappush(heap, (new_dist, v))
+
+    return dist, parents, settled_num
+
+
+def _get_path_from_tree(csr: CSRGraph, dist, parents, end: int) -> Tuple[List[Any], Union[int, Any]]:
+    """
+    从最短路径树中还原到终点的路径
+    :param csr: CSRGraph对象
+    :param dist: 距离数组
+    :param parents: 父节点索引数组
+    :param end: 结束节点索引
+    :return: 最短路径经过的节点ID，最短距离，不可达时返回空列表和GRAPH_MAX_VALUE
+    """
+    if dist[end] == math.inf:
+        return [], GRAPH_MAX_VALUE
+
+    path = []
+    node = end
+    while node != -1:
+        path.append(csr.node_list[node])
+        node = int(parents[node])
+
+    return path[::-1], float(dist[end])
+
+
+def _init_apsp_worker(arrays_meta: List[Dict], out_path: Optional[str], is_directed: bool) -> None:
+    """
+    全源最短路径子进程初始化：连接共享的CSR数组，指定了out_path时打开结果矩阵的内存映射文件
+    """
+    shms, arrays = zip(*[attach_shared_array(meta) for meta in arrays_meta])
+
+    # 保持共享内存对象的引用，避免数组失效
+    _APSP_WORKER_STATE["shms"] = shms
+    _APSP_WORKER_STATE["csr"] = CSRGraph(*arrays, is_directed=is_directed)
+    _APSP_WORKER_STATE["result"] = np.load(out_path, mmap_mode="r+") if out_path is not None else None
+
+
+def _apsp_worker(chunk: Tuple[int, int]) -> Optional[ndarray]:
+    """
+    计算一批起点的单源最短路径
+    :param chunk: 起点索引范围[start, end)
+    :return: 有内存映射文件时直接写入并返回None，否则返回这批起点的距离矩阵
+    """
+    csr, result = _APSP_WORKER_STATE["csr"], _APSP_WORKER_STATE["result"]
+    start, end = chunk
+    rows = result[start:end] if result is not None else np.empty((end - start, csr.number_of_nodes()))
+    for source in range(start, end):
+        rows[source - start] = _dijkstra(csr, source)[0]
+
+    return None if result is not None else rows
+
+
+def _get_path_result(graph, shortest_path: List[Any], length, show: bool) -> tuple[list[Any], str, Union[int, Any]]:
+    """
+    生成最短路径的返回值，需要时可视化
+    :param graph: 原始图对象
+    :param shortest_path: 最短路径经过的节点
+    :param length: 最短距离
+    :param show: 是否可视化
+    :return: 最短路径经过的节点，字符串表达，最短距离
+    """
+    path = "->".join([f"{i}" for i in shortest_path])
+    edges = [(shortest_path[i], shortest_path[i + 1]) for i in range(0, len(shortest_path) - 1)]
+
+    _draw_nodes_and_edges(graph, shortest_path, edges) if show and isinstance(graph, Graph) else None
+
+    return shortest_path, path, length
+
+
+def _get_node_index(csr: CSRGraph, node) -> int:
+    """
+    获取节点索引，节点不存在时抛出NodeNotFound
+    """
+    try:
+        return csr.node_index[node]
+    except KeyError:
+        raise NodeNotFound(f"节点{node}不在图中")
+
+
+def _floyd_blocked(matrix: ndarray, parents: Optional[ndarray], block_size: int) -> None:
+    """
+    分块floyd：依次处理对角块、与对角块同行同列的块、其余块
+    :param matrix: 距离矩阵，原地修改
+    :param parents: 前驱矩阵，原地修改，为None时不记录前驱
+    :param block_size: 分块大小
+    :return: None
+    """
+    node_num = len(matrix)
+    blocks = [slice(i, min(i + block_size, node_num)) for i in range(0, node_num, block_size)]
+
+    for k_block in blocks:
+        k_start, k_end = k_block.start, k_block.stop
+        # 对角块
+        _floyd_relax(matrix, parents, k_block, k_block, k_start, k_end)
+        # 同行、同列的块
+        for block in blocks:
+            if block is not k_block:
+                _floyd_relax(matrix, parents, k_block, block, k_start, k_end)
+                _floyd_relax(matrix, parents, block, k_block, k_start, k_end)
+        # 其余块
+        for row_block in blocks:
+            if row_block is k_block:
+                continue
+            for col_block in blocks:
+                if col_block is not k_block:
+                    _floyd_relax(matrix, parents, row_block, col_block, k_start, k_end)
+
+
+def _floyd_relax(matrix: ndarray, parents: Optional[ndarray], row_block: slice, col_block: slice,
+                 k_start: int, k_end: int) -> None:
+    """
+    以[k_start, k_end)中的节点作为中转节点松弛matrix[row_block, col_block]，parents为None时只更新距离
+    """
+    tile = matrix[row_block, col_block]
+    # 复用缓冲区，避免每个k都申请新的临时矩阵
+    candidate = np.empty_like(tile)
+
+    if parents is None:
+        for k in range(k_start, k_end):
+            # 第k列是跨行的非连续内存，先拷贝成连续数组再做外加
+            np.add.outer(matrix[row_block, k].copy(), matrix[k, col_block], out=candidate)
+            np.minimum(tile, candidate, out=tile)
+        return
+
+    tile_parents = parents[row_block, col_block]
+    mask = np.empty(tile.shape, dtype=bool)
+    for k in range(k_start, k_end):
+        np.add.outer(matrix[row_block, k].copy(), matrix[k, col_block], out=candidate)
+        np.less(candidate, tile, out=mask)
+        if not mask.any():
+            continue
+        np.minimum(tile, candidate, out=tile)
+        np.copyto(tile_parents, parents[k, col_block], where=mask)  # 更新父结点
+
+
+def _get_sorted_edges(csr: CSRGraph) -> Tuple[ndarray, ndarray, ndarray]:
+    """
+    获取按权重升序排列的边，无向图只取上三角，有向图的边按无向边处理
+    :param csr: CSRGraph对象
+    :return: 起点数组，终点数组，权重数组
+    """
+    sources = np.repeat(np.arange(csr.number_of_nodes()), np.diff(csr.indptr))
+    edge_ids = np.nonzero(sources <= csr.indices)[0] if not csr.is_directed else np.arange(len(sources))
+    # 稳定排序，权重相同的边保持(起点, 终点)顺序
+    edge_ids = edge_ids[np.argsort(csr.weights[edge_ids], kind="stable")]
+
+    return sources[edge_ids], csr.indices[edge_ids], csr.weights[edge_ids]
+
+
+def _get_sub_csr_arrays(node_num: int, sources: ndarray, targets: ndarray,
+                        weights: ndarray) -> Tuple[ndarray, ndarray, ndarray]:
+    """
+    从已经按(起点, 终点)排好序的边子集构建CSR数组
+    """
+    indptr = np.zeros(node_num + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=node_num), out=indptr[1:])
+
+    return indptr, targets, weights
+
+
+def _get_csr(graph: Union[Graph, CSRGraph, Dict]) -> CSRGraph:
+    """
+    获取图的CSR结构，已经是CSRGraph时直接返回，避免重复构建
+    :param graph: Graph对象、CSRGraph对象或邻接字典
+    :return: CSRGraph对象
+    """
+    if isinstance(graph, CSRGraph):
+        return graph
+    if isinstance(graph, dict):
+        graph = get_graph_from_dict(graph)
+
+    return CSRGraph.from_graph(graph)
+
+
+def _get_er_edges(node_num: int, edge_num: int, is_directed: bool,
+                  rng: np.random.Generator) -> Tuple[ndarray, ndarray]:
+    """
+    G(n, m)模型：把所有可能的边编号为0~M-1，无放回抽取edge_num个编号后解码为(起点, 终点)
+    """
+    max_edge_num = node_num * (node_num - 1) if is_directed else node_num * (node_num - 1) // 2
+    assert edge_num <= max_edge_num, "边的数量不能大于节点间可能的边数"
+    edge_ids = rng.choice(max_edge_num, size=edge_num, replace=False)
+
+    if is_directed:
+        # 起点为u的边编号为u*(n-1)~u*(n-1)+n-2，跳过自环
+        sources, rest = np.divmod(edge_ids, node_num - 1)
+        return sources, rest + (rest >= sources)
+
+    # 上三角按行编号，第u行之前共有u*(2n-u-1)/2条边，用求根公式反解行号后修正浮点误差
+    def row_offset(row):
+        return row * (2 * node_num - row - 1) // 2
+
+    sources = ((2 * node_num - 1 - np.sqrt((2 * node_num - 1) ** 2 - 8 * edge_ids.astype(np.float64))) // 2)
+    sources = sources.astype(np.int64)
+    sources -= row_offset(sources) > edge_ids
+    sources += row_offset(sources + 1) <= edge_ids
+
+    return sources, edge_ids - row_offset(sources) + sources + 1
+
+
+def _get_ba_edges(node_num: int, attach_num: int, rng: np.random.Generator) -> Tuple[ndarray, ndarray]:
+    """
+    Barabási–Albert模型：节点被选中的概率正比于度数，用记录每条边两个端点的数组实现按度数抽样
+    """
+    assert attach_num < node_num, "每个新节点连接的节点数量必须小于节点数量"
+    edge_num = (node_num - attach_num) * attach_num
+    sources = np.repeat(np.arange(attach_num, node_num), attach_num)
+    targets = np.empty(edge_num, dtype=np.int64)
+    # 已有边的所有端点，每个节点出现的次数等于它的度数
+    endpoints = np.empty(2 * edge_num, dtype=np.int64)
+
+    # 第一个新节点连接所有初始节点
+    targets[:attach_num] = np.arange(attach_num)
+    endpoints[:2 * attach_num:2] = attach_num
+    endpoints[1:2 * attach_num:2] = targets[:attach_num]
+    size = 2 * attach_num
+
+    for node in range(attach_num + 1, node_num):
+        chosen = np.unique(endpoints[rng.integers(0, size, attach_num)])
+        # 抽到重复节点时补抽，直到凑够attach_num个不同节点
+        while len(chosen) < attach_num:
+            extra = endpoints[rng.integers(0, size, attach_num - len(chosen))]
+            chosen = np.unique(np.concatenate((chosen, extra)))
+
+        start = (node - attach_num) * attach_num
+        targets[start:start + attach_num] = chosen
+        endpoints[size:size + 2 * attach_num:2] = node
+        endpoints[size + 1:size + 2 * attach_num:2] = chosen
+        size += 2 * attach_num
+
+    return sources, targets
+
+
+def _get_grid_edges(node_num: int, edge_num: int, rng: np.random.Generator) -> Tuple[ndarray, ndarray]:
+    """
+    网格模型：节点i位于第i // side行、第i % side列，连接右侧和下方的相邻节点
+    """
+    side = math.ceil(math.sqrt(node_num))
+    nodes = np.arange(node_num)
+    right = nodes[(nodes % side != side - 1) & (nodes + 1 < node_num)]
+    down = nodes[nodes + side < node_num]
+    sources = np.concatenate((right, down))
+    targets = np.concatenate((right + 1, down + side))
+
+    assert edge_num <= len(sources), "边的数量不能大于网格中相邻节点的边数"
+    if edge_num < len(sources):
+        keep = np.sort(rng.choice(len(sources), size=edge_num, replace=False))
+        sources, targets = sources[keep], targets[keep]
+
+    return sources, targets
 
 
 def _draw_nodes(graph: Union[Graph, DiGraph], layout, node_color: str, **kwargs) -> None:
@@ -422,13 +1803,9 @@ def _draw_nodes(graph: Union[Graph, DiGraph], layout, node_color: str, **kwargs)
     # 特殊节点
     special_nodes = kwargs.get("special_nodes", None)
 
-    final_nodes_color = []
     if special_nodes is not None:
-        for i in range(graph.number_of_nodes()):
-            if i in special_nodes:
-                final_nodes_color.append('#ff0000')
-            else:
-                final_nodes_color.append(node_color)
+        special_nodes = set(special_nodes)
+        final_nodes_color = ['#ff0000' if node in special_nodes else node_color for node in graph.nodes]
     else:
         final_nodes_color = [node_color] * graph.number_of_nodes()
 
@@ -461,17 +1838,12 @@ def _draw_edges(graph: Graph,
     edges = [(u, v) for (u, v, d) in graph.edges(data=True)]
     # 获取特殊边
     special_edges = kwargs.get("special_edges", None)
-    final_edge_color = []
 
     if special_edges is not None:
-        for edge in edges:
-            if edge in special_edges:
-                final_edge_color.append("r")
-            else:
-                if (edge[1], edge[0]) in special_edges and not isinstance(graph, DiGraph):
-                    final_edge_color.append("r")
-                else:
-                    final_edge_color.append(edge_color)
+        special_edges = set(special_edges)
+        if not isinstance(graph, DiGraph):
+            special_edges |= {(edge[1], edge[0]) for edge in special_edges}
+        final_edge_color = ["r" if edge in special_edges else edge_color for edge in edges]
     else:
         final_edge_color = [edge_color] * len(edges)
 
@@ -1,76 +1,511 @@
-from typing import List
+from typing import (Any, BinaryIO, Dict, Iterable, Iterator, List, MutableSequence, Optional, Sequence, Tuple,
+                    Union)
 
 from operator import gt, lt
 
-import sys
+from concurrent.futures import ProcessPoolExecutor
 
-from algorithm.common.common_util import swap
+from itertools import count, islice
 
-__all__ = ["radix_sort", "shell_sort", "heap_sort", "quick_sort",
-           "merge_sort", "bubble_sort", "insert_sort", "selection_sort"]
+import heapq
 
+import os
 
-def merge_sort(array: List[int], reverse: bool = False) -> None:
+import pickle
+
+import tempfile
+
+import numpy as np
+
+from numpy import ndarray
+
+from algorithm.common.common_util import swap, create_shared_array, attach_shared_array
+
+from fileutil.file_util import PropertyFileUtil
+
+__all__ = ["radix_sort", "shell_sort", "heap_sort", "quick_sort", "merge_sort", "bubble_sort", "insert_sort",
+           "selection_sort", "parallel_merge_sort", "external_sort"]
+
+# 可以排序的对象：可变序列、一维数值ndarray和可写的缓冲区对象
+_Array = Union[MutableSequence[Any], ndarray, memoryview]
+
+# 基数排序支持的元素字节数，其它宽度没有对应的无符号整数类型
+_RADIX_ITEM_SIZES = (1, 2, 4, 8)
+
+# ndarray归并排序时先用np.sort排好的块大小
+_MERGE_BLOCK_SIZE = 1 << 18
+
+# 快速排序中区间长度不超过该值时改用插入排序
+_INSERTION_THRESHOLD = 16
+
+# 快速排序中区间长度达到该值时使用九数取中选取基准
+_NINTHER_THRESHOLD = 40
+
+# 多进程归并排序的默认元素数量阈值，小于该值时在当前进程中排序
+_PARALLEL_THRESHOLD = 1 << 20
+
+# 多进程归并排序中k路归并每次从各段装入的块大小
+_PARALLEL_BLOCK_SIZE = 1 << 16
+
+# 外部排序的默认内存预算（字节）
+_EXTERNAL_MEMORY_LIMIT = 64 * 1024 * 1024
+
+# 外部排序中Python对象每块的默认元素数量
+_EXTERNAL_CHUNK_SIZE = 100000
+
+# 外部排序中Python对象写入临时文件时每批的元素数量
+_PICKLE_BATCH_SIZE = 1024
+
+# 多进程归并排序子进程的状态：共享内存对象和共享数组
+_SORT_WORKER_STATE = {}
+
+
+def merge_sort(array: _Array, reverse: bool = False) -> None:
     """
-    归并排序
-    :param array: 要排序的列表
+    归并排序，稳定排序
+    列表使用自底向上的实现：先找出已有的升序/降序段（降序段原地翻转），不足最小长度的段用插入排序补齐，
+    再在原列表和一个只分配一次的辅助列表之间交替两两归并，部分有序的输入接近线性时间
+    :param array: 要排序的列表、一维数值ndarray或可写的数值缓冲区（例如array.array）
     :param reverse: 是否降序
     :return: None
     """
-    if not array or len(array) <= 2:
+    view = _get_numeric_view(array)
+    if view is not None:
+        _merge_sort_ndarray(view, reverse)
         return
 
-    _merge_sort(array, 0, len(array) - 1, reverse)
-
+    length = len(array)
+    if length < 2:
+        return
 
-def _merge_sort(array: List[int], left_index: int, right_index: int, reverse: bool) -> None:
-    if left_index == right_index:
+    if not isinstance(array, list):
+        # 其它序列不一定支持用列表做切片赋值，在列表上排序后逐个写回
+        values = list(array)
+        merge_sort(values, reverse)
+        _assign(array, values)
         return
 
-    mid_index = left_index + ((right_index - left_index) >> 1)
-    _merge_sort(array, left_index, mid_index, reverse)
-    _merge_sort(array, mid_index + 1, right_index, reverse)
-    _merge_array(array, left_index, mid_index, right_index, reverse)
+    cmp_operator = __get_cmp_operator(reverse)
+    bounds = _get_runs(array, length, cmp_operator)
+    source, target = array, list(array)
+
+    while len(bounds) > 2:
+        merged_bounds = [0]
+        for i in range(0, len(bounds) - 1, 2):
+            if i + 2 < len(bounds):
+                _merge_array(source, target, bounds[i], bounds[i + 1], bounds[i + 2], cmp_operator)
+                merged_bounds.append(bounds[i + 2])
+            else:
+                # 落单的最后一段直接复制
+                _copy_range(source, target, bounds[i], bounds[i], length - bounds[i])
+                merged_bounds.append(length)
+        source, target = target, source
+        bounds = merged_bounds
 
+    if source is not array:
+        array[:] = source
 
-def _merge_array(array: List[int], left_index: int, mid_index: int, right_index: int, reverse: bool):
-    i = 0
-    help_array = [0] * (right_index - left_index + 1)
-    counter1 = left_index
-    counter2 = mid_index + 1
-    cmp_operator = __get_cmp_operator(reverse)
 
-    while counter1 <= mid_index and counter2 <= right_index:
-        if cmp_operator(array[counter1], array[counter2]):
-            help_array[i] = array[counter1]
-            counter1 += 1
+def _get_runs(array: MutableSequence[Any], length: int, cmp_operator) -> List[int]:
+    """
+    找出有序段，返回各段的边界，第i段为[bounds[i], bounds[i + 1])
+    """
+    min_run = _get_min_run(length)
+    bounds = [0]
+    start = 0
+
+    while start < length:
+        end = start + 1
+        if end < length:
+            if cmp_operator(array[end], array[start]):
+                # 严格降序段，翻转后仍然稳定
+                while end < length and cmp_operator(array[end], array[end - 1]):
+                    end += 1
+                _reverse_range(array, start, end - 1)
+            else:
+                while end < length and not cmp_operator(array[end], array[end - 1]):
+                    end += 1
+
+        if end - start < min_run:
+            end = min(start + min_run, length)
+            _insert_sort_range(array, start, end - 1, cmp_operator)
+
+        bounds.append(end)
+        start = end
+
+    return bounds
+
+
+def _get_min_run(length: int) -> int:
+    """
+    与Timsort相同的最小段长度，使段的数量接近2的幂，两两归并时更均衡
+    """
+    remainder = 0
+    while length >= 64:
+        remainder |= length & 1
+        length >>= 1
+
+    return length + remainder
+
+
+def _merge_array(source: MutableSequence[Any], target: MutableSequence[Any], left_index: int, mid_index: int,
+                 right_index: int, cmp_operator) -> None:
+    """
+    将source中相邻的有序段[left_index, mid_index)和[mid_index, right_index)归并到target的同一位置，相等时左侧优先
+    """
+    if not cmp_operator(source[mid_index], source[mid_index - 1]):
+        # 两段已经整体有序
+        _copy_range(source, target, left_index, left_index, right_index - left_index)
+        return
+
+    i, j, k = left_index, mid_index, left_index
+    while i < mid_index and j < right_index:
+        if cmp_operator(source[j], source[i]):
+            target[k] = source[j]
+            j += 1
         else:
-            help_array[i] = array[counter2]
-            counter2 += 1
-        i += 1
+            target[k] = source[i]
+            i += 1
+        k += 1
+
+    if i < mid_index:
+        _copy_range(source, target, i, k, mid_index - i)
+    else:
+        _copy_range(source, target, j, k, right_index - j)
+
+
+def _copy_range(source: MutableSequence[Any], target: MutableSequence[Any], source_index: int, target_index: int,
+                count: int) -> None:
+    """
+    逐个元素复制source[source_index:source_index + count]到target的target_index处，不像切片赋值那样创建临时列表
+    """
+    offset = target_index - source_index
+    for index in range(source_index, source_index + count):
+        target[index + offset] = source[index]
+
+
+def _reverse_range(array: MutableSequence[Any], left_index: int, right_index: int) -> None:
+    """
+    原地翻转闭区间[left_index, right_index]
+    """
+    while left_index < right_index:
+        array[left_index], array[right_index] = array[right_index], array[left_index]
+        left_index += 1
+        right_index -= 1
+
+
+def parallel_merge_sort(array: _Array,
+                        reverse: bool = False,
+                        workers: Optional[int] = None,
+                        threshold: int = _PARALLEL_THRESHOLD,
+                        chunk_size: Optional[int] = None) -> None:
+    """
+    多进程归并排序：把数组分块交给进程池排序，再做k路归并并原地写回，稳定排序
+    一维数值ndarray放入共享内存，子进程原地排序各块，不需要序列化数据；其它对象分块序列化后传给子进程，再用heapq.merge归并
+    :param array: 要排序的列表、一维数值ndarray或可写的数值缓冲区（例如array.array）
+    :param reverse: 是否降序
+    :param workers: 进程数量，为None时使用CPU核数
+    :param threshold: 元素数量小于该值或进程数量为1时，在当前进程中使用merge_sort
+    :param chunk_size: 每块的元素数量，为None时按进程数量均分
+    :return: None
+    """
+    workers = workers if workers is not None else os.cpu_count() or 1
+    assert workers > 0, "进程数量必须大于0"
+    length = len(array)
+    if workers == 1 or length < max(threshold, 2):
+        merge_sort(array, reverse)
+        return
+
+    chunk_size = chunk_size if chunk_size is not None else -(-length // workers)
+    assert chunk_size > 0, "每块的元素数量必须大于0"
+    chunks = [(i, min(i + chunk_size, length)) for i in range(0, length, chunk_size)]
 
-    while counter1 <= mid_index:
-        help_array[i] = array[counter1]
-        counter1 += 1
-        i += 1
+    view = _get_numeric_view(array)
+    if view is not None:
+        _parallel_merge_sort_ndarray(view, reverse, workers, chunks)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        runs = list(executor.map(_sort_chunk, [array[start:end] for start, end in chunks], [reverse] * len(chunks)))
+    # heapq.merge在相等时按段的顺序输出，保持稳定
+    _assign(array, list(heapq.merge(*runs, reverse=reverse)))
 
-    while counter2 <= right_index:
-        help_array[i] = array[counter2]
-        counter2 += 1
-        i += 1
 
-    for i, v in enumerate(help_array):
-        array[left_index + i] = v
+def _sort_chunk(chunk: MutableSequence[Any], reverse: bool) -> MutableSequence[Any]:
+    """
+    子进程中排序序列化传入的块
+    """
+    merge_sort(chunk, reverse)
+    return chunk
+
+
+def _parallel_merge_sort_ndarray(array: ndarray, reverse: bool, workers: int, chunks: List[Tuple[int, int]]) -> None:
+    shm, shared, meta = create_shared_array(array.shape, array.dtype, array)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sort_worker, initargs=(meta,)) as executor:
+            # 消费结果以便抛出子进程中的异常
+            list(executor.map(_sort_worker, chunks))
+
+        # 升序归并到反向视图中即得到降序结果
+        _merge_runs_ndarray([shared[start:end] for start, end in chunks], array[::-1] if reverse else array)
+    finally:
+        # 释放共享内存前不能再持有指向它的数组
+        del shared
+        shm.close()
+        shm.unlink()
+
+
+def _init_sort_worker(meta: Dict) -> None:
+    """
+    多进程归并排序子进程初始化：连接共享数组
+    """
+    _SORT_WORKER_STATE["shm"], _SORT_WORKER_STATE["array"] = attach_shared_array(meta)
 
 
-def bubble_sort(array: List[int], reverse: bool = False) -> None:
+def _sort_worker(chunk: Tuple[int, int]) -> None:
+    """
+    原地升序排序共享数组中的一块
+    :param chunk: 索引范围[start, end)
+    :return: None
+    """
+    start, end = chunk
+    merge_sort(_SORT_WORKER_STATE["array"][start:end])
+
+
+def _merge_runs_ndarray(runs: List[ndarray], out: ndarray) -> None:
+    """
+    把升序的各段归并写入out
+    """
+    position = 0
+    for block in _iter_merged_blocks(runs, _PARALLEL_BLOCK_SIZE):
+        out[position:position + len(block)] = block
+        position += len(block)
+
+
+def external_sort(source: Union[Iterable, str],
+                  output: Optional[str] = None,
+                  reverse: bool = False,
+                  dtype=np.int64,
+                  memory_limit: int = _EXTERNAL_MEMORY_LIMIT,
+                  fan_in: int = 16,
+                  chunk_size: Optional[int] = None,
+                  column: Optional[int] = None,
+                  has_header: bool = False,
+                  temp_dir: Optional[str] = None) -> Optional[Iterator[Any]]:
+    """
+    外部归并排序，用于排序超过内存大小的数据：按块读取输入，每块用merge_sort排序后写入临时文件，
+    再以不超过fan_in路的k路归并逐轮合并，最后一轮归并的结果流式写入输出文件或由生成器返回
+    dtype为数值类型时，块为ndarray，临时文件和输出文件为该类型的原始二进制数据（可用np.fromfile读取）；
+    dtype为None时，元素为任意可比较的Python对象（例如元组记录），临时文件和输出文件为pickle序列化的批次
+    :param source: 可迭代对象，或文件路径：column为None时为dtype类型的二进制文件，否则为csv文件
+    :param output: 输出文件路径，为None时返回排好序的元素生成器
+    :param reverse: 是否降序
+    :param dtype: 元素的numpy数值类型，为None时按Python对象处理
+    :param memory_limit: 内存预算（字节），决定数值类型每块的元素数量和归并时每段装入的元素数量
+    :param fan_in: 每轮归并最多同时打开的临时文件数量
+    :param chunk_size: 每块的元素数量，为None时数值类型由memory_limit计算，Python对象为100000
+    :param column: csv文件中要排序的列序号
+    :param has_header: csv文件第一行是否为表头
+    :param temp_dir: 临时文件所在的文件夹，为None时使用系统默认的临时文件夹
+    :return: 输出到文件时为None，否则为元素生成器
+    """
+    assert fan_in > 1, "归并路数必须大于1"
+    if dtype is not None:
+        dtype = np.dtype(dtype)
+        assert dtype.kind in "biuf", "只支持数值类型"
+
+    if chunk_size is None:
+        chunk_size = max(memory_limit // (2 * dtype.itemsize), 1) if dtype is not None else _EXTERNAL_CHUNK_SIZE
+    assert chunk_size > 0, "每块的元素数量必须大于0"
+    # 归并时各段装入的块和拼接后的结果都在内存中
+    block_size = max(memory_limit // (2 * (fan_in + 1) * dtype.itemsize), 1) if dtype is not None else 0
+
+    blocks = _iter_external_sort(_iter_source_chunks(source, dtype, chunk_size, column, has_header),
+                                 reverse, dtype, fan_in, block_size, temp_dir)
+    if output is None:
+        return (item for block in blocks for item in (block.tolist() if dtype is not None else block))
+
+    with open(output, "wb") as f:
+        _write_blocks(blocks, f, dtype)
+
+
+def _iter_source_chunks(source: Union[Iterable, str], dtype, chunk_size: int, column: Optional[int],
+                        has_header: bool) -> Iterator[Union[ndarray, List[Any]]]:
+    """
+    按块读取外部排序的输入，数值类型的块转换为ndarray
+    """
+    if isinstance(source, str) and column is None:
+        assert dtype is not None, "读取二进制文件时必须指定数值类型"
+        with open(source, "rb") as f:
+            while True:
+                chunk = np.fromfile(f, dtype=dtype, count=chunk_size)
+                if len(chunk) == 0:
+                    return
+                yield chunk
+
+    elif isinstance(source, str):
+        for rows in PropertyFileUtil.iter_csv_data(source, chunk_size, skip_header=has_header):
+            values = [row[column] for row in rows]
+            yield np.asarray(values).astype(dtype) if dtype is not None else values
+
+    else:
+        iterator = iter(source)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            yield np.asarray(chunk, dtype=dtype) if dtype is not None else chunk
+
+
+def _iter_external_sort(chunks: Iterator[Union[ndarray, List[Any]]], reverse: bool, dtype, fan_in: int,
+                        block_size: int, temp_dir: Optional[str]) -> Iterator[Union[ndarray, List[Any]]]:
+    """
+    生成有序段并逐轮归并，临时文件夹在生成器结束或关闭时删除
+    :return: 最后一轮归并输出的有序块
+    """
+    with tempfile.TemporaryDirectory(dir=temp_dir) as work_dir:
+        file_ids = count()
+
+        def write_run(blocks: Iterable[Union[ndarray, List[Any]]]) -> str:
+            path = os.path.join(work_dir, f"run_{next(file_ids)}.bin")
+            with open(path, "wb") as f:
+                _write_blocks(blocks, f, dtype)
+            return path
+
+        run_paths = []
+        for chunk in chunks:
+            merge_sort(chunk, reverse)
+            run_paths.append(write_run([chunk]))
+
+        while len(run_paths) > fan_in:
+            merged_paths = []
+            for i in range(0, len(run_paths), fan_in):
+                group = run_paths[i:i + fan_in]
+                merged_paths.append(write_run(_iter_merged_files(group, reverse, dtype, block_size)))
+                for path in group:
+                    os.remove(path)
+            run_paths = merged_paths
+
+        yield from _iter_merged_files(run_paths, reverse, dtype, block_size)
+
+
+def _iter_merged_files(paths: List[str], reverse: bool, dtype,
+                       block_size: int) -> Iterator[Union[ndarray, List[Any]]]:
+    """
+    k路归并有序的临时文件，数值类型使用内存映射按块归并，Python对象使用heapq.merge
+    """
+    if dtype is not None:
+        yield from _iter_merged_blocks([np.memmap(path, dtype=dtype, mode="r") for path in paths], block_size,
+                                       reverse)
+        return
+
+    merged = heapq.merge(*[_iter_pickle_file(path) for path in paths], reverse=reverse)
+    while True:
+        batch = list(islice(merged, _PICKLE_BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def _write_blocks(blocks: Iterable[Union[ndarray, List[Any]]], f: BinaryIO, dtype) -> None:
+    """
+    写入有序块，Python对象按批次pickle序列化，读取时每次只加载一批
+    """
+    for block in blocks:
+        if dtype is not None:
+            block.tofile(f)
+            continue
+
+        for i in range(0, len(block), _PICKLE_BATCH_SIZE):
+            pickle.dump(block[i:i + _PICKLE_BATCH_SIZE], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _iter_pickle_file(path: str) -> Iterator[Any]:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
+
+
+def _iter_merged_blocks(runs: List[ndarray], block_size: int, reverse: bool = False) -> Iterator[ndarray]:
+    """
+    基于堆的k路归并，以块为单位推进：堆中保存各段当前块最后一个元素和段序号，
+    堆顶(bound, m)所在段的当前块可以整体输出，其它段中排在(bound, m)之前的元素也可以一起输出，
+    值相等时段序号小的在前，保证稳定
+    :param runs: 有序的一维数值数组列表，降序时各段均为降序
+    :param block_size: 每次从各段装入的元素数量
+    :param reverse: 是否降序
+    :return: 依次输出的有序块
+    """
+    cursors = [0] * len(runs)
+    block_ends = [min(block_size, len(run)) for run in runs]
+    heap = [_get_block_key(run, block_end, i, reverse) for i, (run, block_end) in enumerate(zip(runs, block_ends))
+            if block_end > 0]
+    heapq.heapify(heap)
+
+    while heap:
+        min_index = heapq.heappop(heap)[-1]
+        bound = runs[min_index][block_ends[min_index] - 1]
+        pieces = []
+        for i, run in enumerate(runs):
+            cursor, block_end = cursors[i], block_ends[i]
+            if cursor == block_end:
+                continue
+
+            end = cursor + _count_before(run[cursor:block_end], bound, i <= min_index, reverse)
+            pieces.append(run[cursor:end])
+            cursors[i] = end
+
+        # 段的块以NaN结尾时可能已经随其它段的NaN一起输出，此时只需装入下一块
+        if pieces:
+            # 拼接后的各段分别有序，稳定排序会识别出这些段并归并
+            block = np.concatenate(pieces)
+            (block[::-1] if reverse else block).sort(kind="stable")
+            yield block
+
+        # 堆顶所在段的当前块已经全部输出，装入下一块
+        run = runs[min_index]
+        if cursors[min_index] < len(run):
+            block_ends[min_index] = min(cursors[min_index] + block_size, len(run))
+            heapq.heappush(heap, _get_block_key(run, block_ends[min_index], min_index, reverse))
+
+
+def _count_before(block: ndarray, bound, inclusive: bool, reverse: bool) -> int:
+    """
+    有序块中排在bound之前的元素数量，inclusive为True时包含与bound相等的元素
+    """
+    if not reverse:
+        return int(np.searchsorted(block, bound, side="right" if inclusive else "left"))
+
+    # 降序块反转后为升序，排在bound之前的是大于bound的元素
+    return len(block) - int(np.searchsorted(block[::-1], bound, side="left" if inclusive else "right"))
+
+
+def _get_block_key(run: ndarray, block_end: int, index: int, reverse: bool) -> Tuple[bool, Any, int]:
+    """
+    块在堆中的键，NaN的位置与np.sort一致：升序时排在最后，降序时排在最前
+    """
+    value = run[block_end - 1].item()
+    is_nan = value != value
+    return (not is_nan, -value, index) if reverse else (is_nan, value, index)
+
+
+def bubble_sort(array: _Array, reverse: bool = False) -> None:
     """
     冒泡排序
-    :param array: 要排序的列表
+    :param array: 要排序的列表、一维数值ndarray或可写的数值缓冲区（例如array.array）
     :param reverse: 是否降序
     :return: None
     """
-    if not array or len(array) <= 2:
+    view = _get_numeric_view(array)
+    if view is not None:
+        _sort_ndarray(view, reverse, "stable")
+        return
+
+    if len(array) < 2:
         return
 
     length = len(array)
@@ -82,146 +517,221 @@ def bubble_sort(array: List[int], reverse: bool = False) -> None:
                 swap(array, j, j - 1)
 
 
-def insert_sort(array: List[int], reverse: bool = False) -> None:
+def insert_sort(array: _Array, reverse: bool = False) -> None:
     """
     插入排序
-    :param array: 要排序的列表
+    :param array: 要排序的列表、一维数值ndarray或可写的数值缓冲区（例如array.array）
     :param reverse: 是否降序
     :return: None
     """
-    if not array or len(array) <= 2:
+    view = _get_numeric_view(array)
+    if view is not None:
+        _sort_ndarray(view, reverse, "stable")
         return
 
-    length = len(array)
-    cmp_operator = __get_cmp_operator(reverse)
+    if len(array) < 2:
+        return
 
-    for i in range(1, length):
-        for j in range(i, 0, -1):
-            if cmp_operator(array[j], array[j - 1]):
-                swap(array, j, j - 1)
-            else:
-                break
+    _insert_sort_range(array, 0, len(array) - 1, __get_cmp_operator(reverse))
+
+
+def _insert_sort_range(array: MutableSequence[Any], left_index: int, right_index: int, cmp_operator) -> None:
+    """
+    对[left_index, right_index]区间做插入排序，元素后移代替逐个交换
+    """
+    for i in range(left_index + 1, right_index + 1):
+        value = array[i]
+        j = i
+        while j > left_index and cmp_operator(value, array[j - 1]):
+            array[j] = array[j - 1]
+            j -= 1
+        array[j] = value
 
 
-def selection_sort(array: List[int], reverse: bool = False) -> None:
+def selection_sort(array: _Array, reverse: bool = False) -> None:
     """
     选择排序
-    :param array: 要排序的数组
+    :param array: 要排序的列表、一维数值ndarray或可写的数值缓冲区（例如array.array）
     :param reverse: 是否降序
     :return: None
     """
-    if not array or len(array) <= 2:
+    view = _get_numeric_view(array)
+    if view is not None:
+        _sort_ndarray(view, reverse, "quicksort")
+        return
+
+    if len(array) < 2:
         return
 
     length = len(array)
     cmp_operator = __get_cmp_operator(reverse)
 
-    for i in range(length):
-        cmp_val = min(array) - 1 if reverse else sys.maxsize
-        swap_index = 0
-        for j in range(i, length):
-            if cmp_operator(array[j], cmp_val):
+    for i in range(length - 1):
+        swap_index = i
+        for j in range(i + 1, length):
+            if cmp_operator(array[j], array[swap_index]):
                 swap_index = j
-                cmp_val = array[j]
 
         swap(array, i, swap_index)
 
 
-def quick_sort(array: List[int], reverse: bool = False) -> None:
+def quick_sort(array: _Array, reverse: bool = False) -> None:
     """
-    快速排序
-    :param array: 要排序的数组
+    快速排序，迭代实现的内省排序：三数取中/九数取中选取基准，三路划分处理重复元素，
+    小区间改用插入排序，划分深度超过2*log2(n)时改用堆排序，最坏时间复杂度为O(nlogn)
+    :param array: 要排序的列表、一维数值ndarray或可写的数值缓冲区（例如array.array）
     :param reverse: 是否降序
     :return: None
     """
-    if not array or len(array) <= 2:
+    view = _get_numeric_view(array)
+    if view is not None:
+        _sort_ndarray(view, reverse, "quicksort")
         return
 
-    length = len(array)
-    _quick_sort(array, 0, length - 1, reverse)
+    if len(array) < 2:
+        return
 
+    _quick_sort(array, 0, len(array) - 1, reverse)
 
-def _quick_sort(array: List[int], left_index: int, right_index: int, reverse: bool) -> None:
-    if left_index < right_index:
-        pi = _partition(array, left_index, right_index, reverse)
 
-        _quick_sort(array, left_index, pi - 1, reverse)
-        _quick_sort(array, pi + 1, right_index, reverse)
+def _quick_sort(array: MutableSequence[Any], left_index: int, right_index: int, reverse: bool) -> None:
+    cmp_operator = __get_cmp_operator(reverse)
+    # 栈中保存待排序的区间和剩余的划分深度
+    stack = [(left_index, right_index, 2 * (right_index - left_index + 1).bit_length())]
+
+    while stack:
+        left_index, right_index, depth = stack.pop()
+        while right_index - left_index + 1 > _INSERTION_THRESHOLD:
+            if depth == 0:
+                _heap_sort_range(array, left_index, right_index, cmp_operator)
+                break
 
+            depth -= 1
+            less_index, greater_index = _partition(array, left_index, right_index, cmp_operator)
+            # 较大的一侧入栈，继续处理较小的一侧，栈深度不超过O(logn)
+            if less_index - left_index < right_index - greater_index:
+                stack.append((greater_index + 1, right_index, depth))
+                right_index = less_index - 1
+            else:
+                stack.append((left_index, less_index - 1, depth))
+                left_index = greater_index + 1
+        else:
+            _insert_sort_range(array, left_index, right_index, cmp_operator)
 
-def _partition(array: List[int], left_index: int, right_index: int, reverse: bool) -> int:
-    i = (left_index - 1)
-    pivot = array[right_index]
-    cmp_operator = __get_cmp_operator(reverse)
 
-    for j in range(left_index, right_index):
-        if cmp_operator(array[j], pivot):
-            i = i + 1
-            array[i], array[j] = array[j], array[i]
+def _partition(array: MutableSequence[Any], left_index: int, right_index: int, cmp_operator) -> Tuple[int, int]:
+    """
+    三路划分
+    :return: 与基准相等的区间[less_index, greater_index]，左侧均排在基准之前，右侧均排在基准之后
+    """
+    pivot = _get_pivot(array, left_index, right_index, cmp_operator)
+    less_index, i, greater_index = left_index, left_index, right_index
+
+    while i <= greater_index:
+        if cmp_operator(array[i], pivot):
+            array[less_index], array[i] = array[i], array[less_index]
+            less_index += 1
+            i += 1
+        elif cmp_operator(pivot, array[i]):
+            array[i], array[greater_index] = array[greater_index], array[i]
+            greater_index -= 1
+        else:
+            i += 1
 
-    array[i + 1], array[right_index] = array[right_index], array[i + 1]
-    return i + 1
+    return less_index, greater_index
 
 
-def heap_sort(array: List[int], reverse: bool = False) -> None:
+def _get_pivot(array: MutableSequence[Any], left_index: int, right_index: int, cmp_operator) -> Any:
+    """
+    区间较小时三数取中，较大时九数取中（Tukey's ninther）
+    """
+    mid_index = left_index + ((right_index - left_index) >> 1)
+    if right_index - left_index + 1 < _NINTHER_THRESHOLD:
+        return _get_median(array[left_index], array[mid_index], array[right_index], cmp_operator)
+
+    step = (right_index - left_index + 1) >> 3
+    return _get_median(
+        _get_median(array[left_index], array[left_index + step], array[left_index + 2 * step], cmp_operator),
+        _get_median(array[mid_index - step], array[mid_index], array[mid_index + step], cmp_operator),
+        _get_median(array[right_index - 2 * step], array[right_index - step], array[right_index], cmp_operator),
+        cmp_operator)
+
+
+def _get_median(a: Any, b: Any, c: Any, cmp_operator) -> Any:
+    if cmp_operator(a, b):
+        if cmp_operator(b, c):
+            return b
+        return c if cmp_operator(a, c) else a
+
+    if cmp_operator(a, c):
+        return a
+    return c if cmp_operator(b, c) else b
+
+
+def heap_sort(array: _Array, reverse: bool = False) -> None:
     """
     堆排序
-    :param array: 要排序的数组
+    :param array: 要排序的列表、一维数值ndarray或可写的数值缓冲区（例如array.array）
     :param reverse: 是否降序
     :return: None
     """
-    if not array or len(array) <= 2:
+    view = _get_numeric_view(array)
+    if view is not None:
+        _sort_ndarray(view, reverse, "heapsort")
         return
 
-    length = len(array)
+    if len(array) < 2:
+        return
 
-    for i in range(length):
-        _flow(array, i, reverse)
+    _heap_sort_range(array, 0, len(array) - 1, __get_cmp_operator(reverse))
 
-    while length > 0:
-        length -= 1
-        swap(array, 0, length)
-        _sink(array, 0, length, reverse)
 
+def _heap_sort_range(array: MutableSequence[Any], left_index: int, right_index: int, cmp_operator) -> None:
+    """
+    对[left_index, right_index]区间做堆排序，堆顶为排在最后的元素
+    """
+    size = right_index - left_index + 1
+    for i in range((size >> 1) - 1, -1, -1):
+        _sink(array, left_index, i, size, cmp_operator)
 
-def _sink(array: List[int], index: int, max_size: int, reverse: bool) -> None:
-    left_child_index = 2 * index + 1
-    cmp_operator = __get_cmp_operator(reverse)
+    for end in range(size - 1, 0, -1):
+        array[left_index], array[left_index + end] = array[left_index + end], array[left_index]
+        _sink(array, left_index, 0, end, cmp_operator)
 
-    while left_child_index < max_size:
-        right_child_index = left_child_index + 1 if left_child_index + 1 < max_size else left_child_index
-        if reverse:
-            cmp_index = left_child_index if array[left_child_index] < array[right_child_index] else right_child_index
-        else:
-            cmp_index = left_child_index if array[left_child_index] > array[right_child_index] else right_child_index
 
-        if cmp_operator(array[index], array[cmp_index]):
-            swap(array, index, cmp_index)
-            index = cmp_index
-            left_child_index = 2 * index + 1
-        else:
+def _sink(array: MutableSequence[Any], offset: int, index: int, max_size: int, cmp_operator) -> None:
+    """
+    下沉堆中的元素，堆的第index个元素位于array[offset + index]
+    """
+    value = array[offset + index]
+    child_index = 2 * index + 1
+
+    while child_index < max_size:
+        if child_index + 1 < max_size and cmp_operator(array[offset + child_index],
+                                                       array[offset + child_index + 1]):
+            child_index += 1
+        if not cmp_operator(value, array[offset + child_index]):
             break
 
+        array[offset + index] = array[offset + child_index]
+        index = child_index
+        child_index = 2 * index + 1
 
-def _flow(array: List[int], index: int, reverse: bool) -> None:
-    father_index = (index - 1) >> 1
-    cmp_operator = __get_cmp_operator(not reverse)
-    while father_index >= 0:
-        if cmp_operator(array[index], array[father_index]):
-            swap(array, index, father_index)
-            index = father_index
-            father_index = (index - 1) >> 1
-        else:
-            break
+    array[offset + index] = value
 
 
-def shell_sort(array: List[int], reverse: bool = False):
+def shell_sort(array: _Array, reverse: bool = False) -> None:
     """
     希尔排序
-    :param array: 要排序的数组
-    :param reverse:
-    :return:
+    :param array: 要排序的列表、一维数值ndarray或可写的数值缓冲区（例如array.array）
+    :param reverse: 是否降序
+    :return: None
     """
+    view = _get_numeric_view(array)
+    if view is not None:
+        _sort_ndarray(view, reverse, "quicksort")
+        return
+
     n = len(array)
     gap = int(n / 2)
     cmp_operator = __get_cmp_operator(not reverse)
@@ -239,14 +749,236 @@ def shell_sort(array: List[int], reverse: bool = False):
         gap = int(gap / 2)
 
 
-def radix_sort(arr: List[int], reverse: bool = False):
-    n = len(str(max(arr)))
-    for k in range(n):
-        bucket_list = [[] for _ in range(10)]
-        for i in arr:
-            bucket_list[i // (10 ** k) % 10].append(i)
-        arr = [j for i in bucket_list for j in i]
-    return arr[::-1] if reverse else arr
+def radix_sort(array: _Array, reverse: bool = False, digit_bits: int = 16) -> None:
+    """
+    基数排序，按8位或16位一组从低位到高位（LSD）做稳定的计数排序，原地排序，稳定排序
+    整数翻转符号位、浮点数按IEEE 754规则变换为保持顺序的无符号整数键，所有键在某一位上相同时跳过该轮
+    列表中超过64位的整数使用纯Python的计数排序，元素宽度不是1、2、4、8字节的数值类型（例如np.longdouble）使用稳定的np.sort
+    元素不是整数或浮点数时抛出TypeError，只读的缓冲区同样抛出TypeError
+    :param array: 要排序的列表、一维数值ndarray或可写的数值缓冲区（例如array.array），元素为整数或浮点数
+    :param reverse: 是否降序
+    :param digit_bits: 每轮排序的位数，8或16
+    :return: None
+    """
+    assert digit_bits in (8, 16), "每轮排序的位数只能为8或16"
+    if len(array) < 2:
+        return
+
+    view = _get_numeric_view(array)
+    if view is not None:
+        if view.dtype.itemsize not in _RADIX_ITEM_SIZES:
+            _sort_ndarray(view, reverse, "stable")
+            return
+
+        keys, _ = _lsd_radix_sort(_get_radix_keys(view, reverse), digit_bits)
+        view[:] = _get_radix_values(keys, view.dtype, reverse)
+        return
+
+    keys = _get_list_radix_keys(array)
+    if keys is None:
+        order = _lsd_radix_sort_wide(array, reverse, digit_bits)
+    elif keys.dtype.itemsize not in _RADIX_ITEM_SIZES:
+        order = _get_stable_order(keys, reverse).tolist()
+    else:
+        order = _lsd_radix_sort(_get_radix_keys(keys, reverse), digit_bits, np.arange(len(array)))[1].tolist()
+    _assign(array, [array[i] for i in order])
+
+
+def _get_stable_order(keys: ndarray, reverse: bool) -> ndarray:
+    """
+    稳定排序的索引，降序时相等元素也保持原来的顺序
+    """
+    if not reverse:
+        return np.argsort(keys, kind="stable")
+
+    # 反转后升序稳定排序，再反转结果，相等元素按原索引升序排列
+    return (len(keys) - 1 - np.argsort(keys[::-1], kind="stable"))[::-1]
+
+
+def _get_list_radix_keys(array: Sequence[Any]) -> Optional[ndarray]:
+    """
+    把列表转换为数值ndarray，整数超过64位时返回None
+    """
+    types = set(map(type, array))
+    if types <= {int, bool}:
+        try:
+            return np.array(array, dtype=np.int64)
+        except OverflowError:
+            return None
+
+    # 整数和浮点数混合时按float64比较
+    values = np.asarray(array)
+    if values.ndim != 1 or values.dtype.kind not in "biuf":
+        raise TypeError("基数排序只支持整数和浮点数")
+    return values
+
+
+def _get_radix_keys(values: ndarray, reverse: bool) -> ndarray:
+    """
+    转换为顺序相同的无符号整数键：有符号整数翻转符号位；浮点数的负数翻转所有位，非负数翻转符号位，NaN统一排在最后；
+    降序时再按位取反
+    """
+    kind, bits = values.dtype.kind, values.dtype.itemsize * 8
+    unsigned = np.dtype(f"u{values.dtype.itemsize}")
+    sign_bit, all_ones = unsigned.type(1 << (bits - 1)), unsigned.type((1 << bits) - 1)
+
+    if kind == "f":
+        raw = values.view(unsigned)
+        keys = raw ^ np.where(raw >= sign_bit, all_ones, sign_bit)
+        keys[np.isnan(values)] = all_ones
+    elif kind == "i":
+        keys = values.view(unsigned) ^ sign_bit
+    else:
+        keys = values.astype(unsigned)
+
+    if reverse:
+        np.invert(keys, out=keys)
+    return keys
+
+
+def _get_radix_values(keys: ndarray, dtype: np.dtype, reverse: bool) -> ndarray:
+    """
+    _get_radix_keys的逆变换
+    """
+    bits = dtype.itemsize * 8
+    unsigned = keys.dtype
+    sign_bit, all_ones = unsigned.type(1 << (bits - 1)), unsigned.type((1 << bits) - 1)
+    if reverse:
+        np.invert(keys, out=keys)
+
+    if dtype.kind == "f":
+        return (keys ^ np.where(keys >= sign_bit, sign_bit, all_ones)).view(dtype)
+    if dtype.kind == "i":
+        return (keys ^ sign_bit).view(dtype)
+    return keys.astype(dtype)
+
+
+def _lsd_radix_sort(keys: ndarray, digit_bits: int,
+                    order: Optional[ndarray] = None) -> Tuple[ndarray, Optional[ndarray]]:
+    """
+    对无符号整数键做LSD基数排序
+    :param keys: 无符号整数键
+    :param digit_bits: 每轮排序的位数
+    :param order: 随键一起重排的数组，例如原始位置
+    :return: 排好序的键，重排后的order
+    """
+    length = len(keys)
+    digit_type = np.uint8 if digit_bits == 8 else np.uint16
+
+    for shift in range(0, keys.dtype.itemsize * 8, digit_bits):
+        # 转换为更窄的无符号整数时只保留低位
+        digits = (keys >> shift).astype(digit_type)
+        # 所有键在这一位上相同时跳过
+        if np.bincount(digits, minlength=1 << digit_bits).max() == length:
+            continue
+
+        # 8/16位整数的稳定argsort在numpy中就是计数排序：统计各桶数量，前缀和得到桶的起始位置，再依次放置
+        indices = np.argsort(digits, kind="stable")
+        keys = keys[indices]
+        if order is not None:
+            order = order[indices]
+
+    return keys, order
+
+
+def _lsd_radix_sort_wide(array: Sequence[int], reverse: bool, digit_bits: int) -> List[int]:
+    """
+    超过64位的整数使用纯Python的LSD计数排序，键为与最小值（降序时为最大值）的差
+    :return: 排好序后各位置的元素在原列表中的索引
+    """
+    length = len(array)
+    if reverse:
+        maximum = max(array)
+        keys = [maximum - x for x in array]
+    else:
+        minimum = min(array)
+        keys = [x - minimum for x in array]
+    mask = (1 << digit_bits) - 1
+    max_key = max(keys)
+    order = list(range(length))
+    shift = 0
+
+    while max_key >> shift:
+        digits = [(keys[i] >> shift) & mask for i in order]
+        counts = [0] * (mask + 1)
+        for digit in digits:
+            counts[digit] += 1
+
+        if max(counts) < length:
+            # 前缀和得到每个桶的起始位置
+            total = 0
+            for digit in range(mask + 1):
+                counts[digit], total = total, total + counts[digit]
+
+            sorted_order = [0] * length
+            for i, digit in zip(order, digits):
+                sorted_order[counts[digit]] = i
+                counts[digit] += 1
+            order = sorted_order
+
+        shift += digit_bits
+
+    return order
+
+
+def _get_numeric_view(array: _Array) -> Optional[ndarray]:
+    """
+    获取可以使用numpy原地排序的一维数值数组：数值ndarray直接返回，支持缓冲区协议的对象（array.array、bytearray、
+    memoryview等）零拷贝地包装为ndarray，排序直接修改原缓冲区；其它对象返回None，使用逐个元素访问的实现
+    """
+    if isinstance(array, ndarray):
+        return array if array.ndim == 1 and array.dtype.kind in "biuf" else None
+
+    if isinstance(array, list):
+        return None
+
+    try:
+        buffer = memoryview(array)
+    except TypeError:
+        return None
+
+    if buffer.readonly:
+        raise TypeError("只读的缓冲区无法原地排序")
+    view = np.asarray(buffer)
+    return view if view.ndim == 1 and view.dtype.kind in "biuf" else None
+
+
+def _assign(array: MutableSequence[Any], values: List[Any]) -> None:
+    """
+    把values写回array，列表和ndarray直接切片赋值，其它序列逐个赋值
+    """
+    if isinstance(array, (list, ndarray)):
+        array[:] = values
+        return
+
+    for i, value in enumerate(values):
+        array[i] = value
+
+
+def _sort_ndarray(array: ndarray, reverse: bool, kind: str) -> None:
+    """
+    使用np.sort原地排序，kind与列表实现的算法特性对应（稳定排序使用stable）
+    """
+    # 在反向视图上升序排序即可原地得到降序结果
+    view = array[::-1] if reverse else array
+    view.sort(kind=kind)
+
+
+def _merge_sort_ndarray(array: ndarray, reverse: bool) -> None:
+    """
+    分块归并排序：每块先用np.sort稳定排序，再自底向上两两归并相邻的有序段，全程原地进行
+    """
+    view = array[::-1] if reverse else array
+    length = len(view)
+    for start in range(0, length, _MERGE_BLOCK_SIZE):
+        view[start:start + _MERGE_BLOCK_SIZE].sort(kind="stable")
+
+    width = _MERGE_BLOCK_SIZE
+    while width < length:
+        for left_index in range(width, length, 2 * width):
+            # 稳定排序会识别出两个有序段并线性归并，比searchsorted计算位置再散列写入更快
+            view[left_index - width:left_index + width].sort(kind="stable")
+        width *= 2
 
 
 def __get_cmp_operator(reverse):
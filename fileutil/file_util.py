@@ -177,6 +177,34 @@ class PropertyFileUtil:
 
             return [i for i in reader]
 
+    @staticmethod
+    def iter_csv_data(file_name: str,
+                      chunk_size: int = 100000,
+                      skip_header: bool = False,
+                      encoding: str = 'utf-8') -> Generator[List[List[str]], None, None]:
+        """
+        分块读取csv文件，内存中最多同时保存chunk_size行
+        :param file_name: csv文件路径
+        :param chunk_size: 每块的行数
+        :param skip_header: 是否跳过第一行表头
+        :param encoding: 文件编码方式
+        :return: 行列表生成器，每次生成一块
+        """
+        with open(file_name, newline='', encoding=encoding) as f:
+            reader = csv.reader(f)
+            if skip_header:
+                next(reader, None)
+
+            chunk = []
+            for row in reader:
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+
+            if chunk:
+                yield chunk
+
     @staticmethod
     def get_xml_data(file_path: str) -> dict[Element, dict[Any, Any]]:
         """
@@ -0,0 +1,180 @@
+import gc
+
+import json
+
+import platform
+
+import time
+
+import tracemalloc
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from algorithm.graph.graph_util import (get_random_graph, bfs, dfs, prim, kruskal, floyd, get_shortest_path,
+                                        get_all_path)
+
+__all__ = ["benchmark_graph_functions", "get_benchmark_markdown", "save_benchmark", "run_graph_benchmark",
+           "DEFAULT_GRAPH_SIZES"]
+
+# 默认测试的节点数量，稀疏图的边数为节点数的3倍，稠密图的边数为所有可能边数的10%
+DEFAULT_GRAPH_SIZES = (100, 300, 1000, 3000, 10000)
+
+
+def benchmark_graph_functions(sizes: Iterable[int] = DEFAULT_GRAPH_SIZES,
+                              kinds: Iterable[str] = ("sparse", "dense"),
+                              seed: int = 0,
+                              repeats: int = 3,
+                              warmup: int = 1,
+                              max_dense_nodes: int = 3000,
+                              max_floyd_nodes: int = 1000,
+                              path_limit: int = 1000,
+                              path_cutoff: int = 6,
+                              show_detail: bool = False) -> List[Dict[str, Any]]:
+    """
+    对graph_util中的算法做规模递增的基准测试，记录耗时和tracemalloc统计的峰值内存
+    :param sizes: 节点数量序列
+    :param kinds: 图的稠密程度，sparse或dense
+    :param seed: 随机种子，相同的种子生成相同的图
+    :param repeats: 计时重复次数
+    :param warmup: 计时前的预热次数
+    :param max_dense_nodes: 稠密图的最大节点数量，超过时跳过
+    :param max_floyd_nodes: floyd的最大节点数量，超过时跳过
+    :param path_limit: get_all_path最多枚举的路径数量
+    :param path_cutoff: get_all_path路径最多包含的边数，路径数量上限不能限制搜索时间，必须同时限制深度
+    :param show_detail: 是否打印每一项的结果
+    :return: 测试结果列表
+    """
+    assert repeats > 0, "计时重复次数必须大于0"
+    results = []
+    for kind in kinds:
+        for node_num in sizes:
+            if kind == "dense" and node_num > max_dense_nodes:
+                continue
+
+            edge_num = _get_edge_num(node_num, kind)
+            graph = get_random_graph(node_num, edge_num, is_directed=False, seed=seed)
+            for name, function in _get_graph_cases(graph, node_num, max_floyd_nodes, path_limit, path_cutoff):
+                record = {"function": name, "kind": kind, "node_num": node_num, "edge_num": edge_num}
+                record.update(_measure(function, repeats, warmup))
+                results.append(record)
+
+                if show_detail:
+                    print(f"{name} {kind} V={node_num} E={edge_num}: 最快{record['best_seconds']:.6f}秒，"
+                          f"峰值内存{record['peak_memory_bytes']}字节")
+
+    return results
+
+
+def get_benchmark_markdown(results: List[Dict[str, Any]]) -> str:
+    """
+    把测试结果转换为markdown表格，按函数、稠密程度、节点数量排序，便于在不同提交之间diff
+    :param results: 测试结果列表
+    :return: markdown表格
+    """
+    lines = ["| function | kind | V | E | best (s) | mean (s) | peak memory (KiB) |",
+             "| --- | --- | ---: | ---: | ---: | ---: | ---: |"]
+    for record in sorted(results, key=lambda r: (r["function"], r["kind"], r["node_num"])):
+        lines.append(f"| {record['function']} | {record['kind']} | {record['node_num']} | {record['edge_num']} | "
+                     f"{record['best_seconds']:.6f} | {record['mean_seconds']:.6f} | "
+                     f"{record['peak_memory_bytes'] / 1024:.1f} |")
+
+    return "\n".join(lines) + "\n"
+
+
+def save_benchmark(results: List[Dict[str, Any]], json_path: str, markdown_path: Optional[str] = None) -> None:
+    """
+    保存测试结果为json文件和markdown文件
+    :param results: 测试结果列表
+    :param json_path: json文件路径
+    :param markdown_path: markdown文件路径，为None时不保存
+    :return: None
+    """
+    data = {
+        "environment": {"python": platform.python_version(), "numpy": np.__version__,
+                        "machine": platform.machine()},
+        "results": sorted(results, key=lambda r: (r["function"], r["kind"], r["node_num"])),
+    }
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+    if markdown_path is not None:
+        with open(markdown_path, "w", encoding="utf-8") as f:
+            f.write(get_benchmark_markdown(results))
+
+
+def run_graph_benchmark(json_path: str = "graph_benchmark.json",
+                        markdown_path: str = "graph_benchmark.md",
+                        **kwargs) -> List[Dict[str, Any]]:
+    """
+    运行默认的基准测试并保存结果
+    :param json_path: json文件路径
+    :param markdown_path: markdown文件路径
+    :param kwargs: 传给benchmark_graph_functions的参数
+    :return: 测试结果列表
+    """
+    results = benchmark_graph_functions(**kwargs)
+    save_benchmark(results, json_path, markdown_path)
+
+    return results
+
+
+def _get_edge_num(node_num: int, kind: str) -> int:
+    max_edge_num = node_num * (node_num - 1) // 2
+    if kind == "sparse":
+        return min(3 * node_num, max_edge_num)
+    if kind == "dense":
+        return max(1, max_edge_num // 10)
+
+    raise ValueError(f"不支持的图类型{kind}")
+
+
+def _get_graph_cases(graph, node_num: int, max_floyd_nodes: int, path_limit: int,
+                     path_cutoff: int) -> List[Tuple[str, Callable[[], Any]]]:
+    """
+    获取要测试的函数，目标节点固定为最后一个节点
+    """
+    end = node_num - 1
+    cases = [
+        ("bfs", lambda: bfs(graph, 0)),
+        ("dfs", lambda: dfs(graph, 0)),
+        ("prim", lambda: prim(graph)),
+        ("kruskal", lambda: kruskal(graph)),
+        ("get_shortest_path", lambda: get_shortest_path(graph, 0, end)),
+        ("get_all_path", lambda: get_all_path(graph, 0, end, cutoff=path_cutoff, limit=path_limit)),
+    ]
+    if node_num <= max_floyd_nodes:
+        cases.append(("floyd", lambda: floyd(graph)))
+
+    return cases
+
+
+def _measure(function: Callable[[], Any], repeats: int, warmup: int) -> Dict[str, Any]:
+    """
+    先预热，再重复计时，最后单独运行一次统计峰值内存，避免tracemalloc影响计时
+    """
+    for _ in range(warmup):
+        function()
+
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"best_seconds": min(times), "mean_seconds": sum(times) / len(times), "repeats": repeats,
+            "peak_memory_bytes": peak}
+
+
+if __name__ == '__main__':
+    print(get_benchmark_markdown(run_graph_benchmark(show_detail=True)))